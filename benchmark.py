@@ -0,0 +1,337 @@
+import argparse
+import csv
+import gc
+import heapq
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from scheduling import LAWYERS_PER_PAGE, dataset_city_sizes, order_by_cost
+from us_states import city_key_for_link
+
+DATASET_FILE = "final/final_lawyer_data.csv"
+LINKS_DIRECTORY = "state_links/"
+
+CITY_OVERHEAD_SECONDS = 4  # driver.get plus the post-load sleep
+PAGE_SECONDS = 3  # card extraction plus the post-click sleep
+
+# Each runs in a fresh interpreter, from an empty directory to catch side effects
+STARTUP_COMMANDS = [
+    ("python", ["-c", "pass"]),
+    ("import main", ["-c", "import main"]),
+    ("main.py status", ["main.py", "status"]),
+    ("main.py merge --help", ["main.py", "merge", "--help"]),
+    ("import crawler", ["-c", "import crawler"]),
+    ("import data_handling", ["-c", "import data_handling"]),
+]
+
+
+def load_state_links(directory=LINKS_DIRECTORY):
+    """Return {filename: [city links]} in the order the crawler reads them."""
+    states = {}
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".txt"):
+            with open(os.path.join(directory, filename), "r") as f:
+                states[filename] = [line.strip() for line in f if line.strip()]
+    return states
+
+
+def simulated_city_costs(states, dataset_file=DATASET_FILE):
+    """Estimate crawl seconds per city from the lawyer counts in the dataset.
+
+    Uses the same per-city counts that seed the crawler's CityCostModel.
+    """
+    lawyers_per_city = dataset_city_sizes(dataset_file)
+
+    costs = {}
+    for links in states.values():
+        for link in links:
+            lawyers = lawyers_per_city.get(city_key_for_link(link), 0)
+            pages = max(1, math.ceil(lawyers / LAWYERS_PER_PAGE))
+            costs[link] = CITY_OVERHEAD_SECONDS + pages * PAGE_SECONDS
+    return costs
+
+
+def round_robin_makespan(states, costs, workers):
+    """Makespan of the old scheduler: one pool per state, links split [i::workers]."""
+    total = 0
+    for links in states.values():
+        total += max(
+            sum(costs[link] for link in links[i::workers]) for i in range(workers)
+        )
+    return total
+
+
+def list_makespan(links, costs, workers):
+    """Makespan when idle workers pull the next link from a shared queue."""
+    finish_times = [0] * workers
+    for link in links:
+        heapq.heappush(finish_times, heapq.heappop(finish_times) + costs[link])
+    return max(finish_times)
+
+
+def bench_schedule(args):
+    states = load_state_links(args.links)
+    if args.state:
+        states = {
+            name: links for name, links in states.items() if name == f"{args.state}.txt"
+        }
+    costs = simulated_city_costs(states, args.dataset)
+    links = list(dict.fromkeys(link for links in states.values() for link in links))
+
+    baseline = round_robin_makespan(states, costs, args.workers)
+    pooled = list_makespan(links, costs, args.workers)
+    largest_first = order_by_cost((costs[link], link) for link in links)
+    lpt = list_makespan(largest_first, costs, args.workers)
+    # The order LPT guards against: the biggest cities starting last
+    smallest_first = list(reversed(largest_first))
+    worst = list_makespan(smallest_first, costs, args.workers)
+    lower_bound = max(sum(costs.values()) / args.workers, max(costs.values()))
+
+    print(f"Cities: {len(links)}, workers: {args.workers}")
+    print(f"Largest city: {max(costs.values()) / 60:.1f} min")
+    print(f"Per-state round robin:  {baseline / 60:.1f} min")
+    print(f"Pooled, file order:     {pooled / 60:.1f} min")
+    print(f"Pooled, smallest first: {worst / 60:.1f} min")
+    print(f"Pooled, largest first:  {lpt / 60:.1f} min")
+    print(f"Lower bound:            {lower_bound / 60:.1f} min")
+    print(f"Pooling gain over round robin:    {baseline / pooled:.2f}x")
+    print(f"Ordering gain over file order:    {pooled / lpt:.2f}x")
+    print(f"Ordering gain over smallest first: {worst / lpt:.2f}x")
+
+
+QUERY_SAMPLES = [
+    {"state": "OH", "position": "partner"},
+    {"state": "NY", "city": "New York"},
+    {"firm": "Dorroh & Mills, P.C."},
+    {"phone": "205-710-3523"},
+    {"domain": "dorrohlaw.com"},
+    {"text": "family law"},
+    {"state": "CA", "page": 10},
+]
+
+
+def bench_query(args):
+    from query_service import LawyerIndex, build_index
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "lawyers.db")
+        start = time.perf_counter()
+        count = build_index(args.dataset, db_path)
+        print(f"Built index of {count} rows in {time.perf_counter() - start:.2f}s")
+
+        index = LawyerIndex(db_path)
+        for sample in QUERY_SAMPLES:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = index.search(**sample)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(
+                f"{sample}: {result['total']} matches,"
+                f" p50 {statistics.median(timings):.3f} ms, p95 {p95:.3f} ms"
+            )
+        index.close()
+
+
+def bench_normalize(args):
+    import pandas as pd
+
+    from data_handling import normalize_lawyer_data
+    from query_service import phone_digits, website_domain
+    from us_states import parse_address
+
+    df = pd.read_csv(args.dataset)
+    if args.scale > 1:
+        df = pd.concat([df] * args.scale, ignore_index=True)
+    rows = len(df)
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        normalize_lawyer_data(df)
+        timings.append(time.perf_counter() - start)
+    vectorized = min(timings)
+
+    # Per-row Python doing only the address, phone and website parsing
+    records = df.fillna("").to_dict("records")
+    start = time.perf_counter()
+    for record in records:
+        parse_address(record["Address"])
+        phone_digits(record["Phone Number"])
+        website_domain(record["Website"])
+    per_row = time.perf_counter() - start
+
+    print(f"Rows: {rows}")
+    print(f"Vectorized normalize: {rows / vectorized:,.0f} rows/s ({vectorized:.3f}s)")
+    print(f"Per-row parsing only: {rows / per_row:,.0f} rows/s ({per_row:.3f}s)")
+
+
+def _parse_rows(rows):
+    from query_service import phone_digits, website_domain
+    from us_states import parse_address
+
+    for row in rows:
+        parse_address(row[3])
+        phone_digits(row[4])
+        website_domain(row[5])
+
+
+def bench_profiling(args):
+    from profiling import CrawlProfiler
+
+    with open(args.dataset, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))[1:]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = CrawlProfiler(directory=tmp)
+        _parse_rows(rows)  # Warm-up, so "off" is not the only cold run
+        # Modes take turns on every round and the best round counts, so drift
+        # in CPU frequency, caches or leftover garbage hits them all alike
+        results = {}
+        for _ in range(args.repeat):
+            for mode in (None, "sample", "cprofile"):
+                profiler.mode = mode
+                gc.collect()
+                start = time.perf_counter()
+                for i in range(args.cities):
+                    with profiler.profile_city(
+                        f"https://example.com/all-lawyers/c{i}/s/"
+                    ):
+                        _parse_rows(rows)
+                elapsed = time.perf_counter() - start
+                results[mode] = min(results.get(mode, elapsed), elapsed)
+
+    baseline = results[None]
+    for mode, elapsed in results.items():
+        print(
+            f"{mode or 'off'}: {elapsed:.3f}s"
+            f" ({(elapsed / baseline - 1) * 100:+.1f}% vs off)"
+        )
+
+
+def _traced_bytes(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def bench_memory(args):
+    import pandas as pd
+
+    from data_handling import STRING_DTYPE
+    from records import iter_records
+
+    def read_lists():
+        with open(args.dataset, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader)
+            return [row for row in reader]
+
+    rows, list_bytes = _traced_bytes(read_lists)
+    records, record_bytes = _traced_bytes(lambda: list(iter_records([args.dataset])))
+    count = len(records)
+    print(f"Records: {count}")
+    print(f"list of str per row:   {list_bytes / len(rows):.0f} bytes/record")
+    print(f"LawyerRecord:          {record_bytes / count:.0f} bytes/record")
+    del rows, records
+
+    object_df = pd.read_csv(args.dataset, dtype=object)
+    string_df = pd.read_csv(args.dataset, dtype=STRING_DTYPE, keep_default_na=False)
+    object_bytes = object_df.memory_usage(deep=True).sum()
+    string_bytes = string_df.memory_usage(deep=True).sum()
+    print(f"pandas object columns: {object_bytes / len(object_df):.0f} bytes/record")
+    print(f"pandas Arrow columns:  {string_bytes / len(string_df):.0f} bytes/record")
+
+    # Peak while streaming, which is what the generator flow holds at any time
+    # (the interned firm/address strings plus one record)
+    tracemalloc.start()
+    for _ in iter_records([args.dataset]):
+        pass
+    streamed_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"Streaming peak:        {streamed_peak / 1024:.0f} KiB for {count} records")
+
+
+def bench_importtime(args):
+    repo = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=repo)
+
+    for label, command in STARTUP_COMMANDS:
+        if command[0].endswith(".py"):
+            command = [os.path.join(repo, command[0]), *command[1:]]
+        timings = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                subprocess.run(
+                    [sys.executable, *command],
+                    cwd=tmp,
+                    env=env,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    check=True,
+                )
+                timings.append((time.perf_counter() - start) * 1000)
+            created = sorted(os.listdir(tmp))
+        print(
+            f"{label}: p50 {statistics.median(timings):.0f} ms,"
+            f" min {min(timings):.0f} ms,"
+            f" created {', '.join(created) if created else 'nothing'}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the lawyer scraper")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    schedule = subparsers.add_parser("schedule", help="Simulated crawl makespan")
+    schedule.add_argument("--links", default=LINKS_DIRECTORY)
+    schedule.add_argument("--dataset", default=DATASET_FILE)
+    schedule.add_argument("--workers", type=int, default=5)
+    schedule.add_argument("--state", help="Only simulate one state link file")
+    schedule.set_defaults(func=bench_schedule)
+
+    query = subparsers.add_parser("query", help="Indexed query latency")
+    query.add_argument("--dataset", default=DATASET_FILE)
+    query.add_argument("--repeat", type=int, default=200)
+    query.set_defaults(func=bench_query)
+
+    normalize = subparsers.add_parser("normalize", help="Normalization throughput")
+    normalize.add_argument("--dataset", default=DATASET_FILE)
+    normalize.add_argument("--repeat", type=int, default=3)
+    normalize.add_argument(
+        "--scale", type=int, default=1, help="Repeat the rows N times"
+    )
+    normalize.set_defaults(func=bench_normalize)
+
+    profiling = subparsers.add_parser("profiling", help="Profiler overhead")
+    profiling.add_argument("--dataset", default=DATASET_FILE)
+    profiling.add_argument("--cities", type=int, default=5)
+    profiling.add_argument("--repeat", type=int, default=5)
+    profiling.set_defaults(func=bench_profiling)
+
+    memory = subparsers.add_parser("memory", help="Bytes per lawyer record")
+    memory.add_argument("--dataset", default=DATASET_FILE)
+    memory.set_defaults(func=bench_memory)
+
+    importtime = subparsers.add_parser("importtime", help="CLI startup time")
+    importtime.add_argument("--repeat", type=int, default=10)
+    importtime.set_defaults(func=bench_importtime)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
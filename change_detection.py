@@ -0,0 +1,181 @@
+import csv
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+from records import FIELDNAMES, iter_records
+from us_states import city_key_for_address, city_key_for_link
+
+FINGERPRINTS_FILE = "city_fingerprints.json"
+ROSTER_DIRECTORY = "cache/rosters"
+CONSOLIDATED_FILE = "final/final_lawyer_data.csv"
+DELTA_DIRECTORY = "deltas"
+
+# Profile URL is left out, the consolidated dataset predates it
+COMPARED_FIELDS = FIELDNAMES.index("Profile URL")
+
+
+def fingerprint_page(result_count, card_texts):
+    """Fingerprint a city's first listing page from its result count and cards."""
+    digest = hashlib.sha1("\x1f".join(card_texts).encode("utf-8")).hexdigest()
+    return {"result_count": result_count, "cards": len(card_texts), "hash": digest}
+
+
+class RosterWriter:
+    """Stream one city's lawyers to a temporary roster as they are crawled.
+
+    The roster replaces the previous one on commit, so a crawl that stops
+    early leaves the last complete roster in place.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.temp_path = f"{path}.tmp"
+        self.file = open(self.temp_path, mode="w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(FIELDNAMES)
+
+    def add(self, record):
+        self.writer.writerow(record.to_row())
+
+    def commit(self):
+        self.file.close()
+        os.replace(self.temp_path, self.path)
+
+    def close(self):
+        """Discard the roster unless it was committed."""
+        if not self.file.closed:
+            self.file.close()
+            os.remove(self.temp_path)
+
+
+class CityFingerprints:
+    """First-page fingerprints and lawyer rosters from the last crawl of every city.
+
+    Each roster is a small CSV under cache/rosters/, so a refresh can tell
+    which lawyers left a city whatever address their card shows.
+    """
+
+    def __init__(self, filename=FINGERPRINTS_FILE, roster_directory=ROSTER_DIRECTORY):
+        self.filename = filename
+        self.roster_directory = roster_directory
+        self.lock = threading.Lock()
+        self.fingerprints = self._load_fingerprints()
+
+    def _load_fingerprints(self):
+        try:
+            with open(self.filename, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_fingerprints(self):
+        with open(self.filename, "w") as f:
+            json.dump(self.fingerprints, f)
+
+    def is_unchanged(self, link, fingerprint):
+        return self.fingerprints.get(link) == fingerprint
+
+    def _roster_path(self, link):
+        url_hash = hashlib.md5(link.encode()).hexdigest()
+        return os.path.join(self.roster_directory, f"{url_hash}.csv")
+
+    def roster(self, link):
+        """The lawyers listed on the last crawl of the city, or None.
+
+        They are read lazily, when the city's delta is closed.
+        """
+        path = self._roster_path(link)
+        if not os.path.exists(path):
+            return None
+        return iter_records([path])
+
+    def start_roster(self, link):
+        os.makedirs(self.roster_directory, exist_ok=True)
+        return RosterWriter(self._roster_path(link))
+
+    def update(self, link, fingerprint):
+        with self.lock:
+            self.fingerprints[link] = fingerprint
+            self._save_fingerprints()
+
+
+class CityDelta:
+    """Diff one city's fresh records against the consolidated dataset as they arrive."""
+
+    def __init__(self, delta_writer, city_link, previous=None):
+        self.delta_writer = delta_writer
+        self.city_link = city_link
+        self.previous = previous
+        self.seen = set()
+        self.changes = 0
+
+    def add(self, record):
+        self.seen.add(record.name)
+        existing = self.delta_writer.by_name.get(record.name)
+        if existing is None:
+            self._report("added", record)
+        elif existing[:COMPARED_FIELDS] != record[:COMPARED_FIELDS]:
+            self._report("changed", record)
+
+    def close(self):
+        """Report the city's lawyers that are gone and return the change count."""
+        previous = self.previous
+        if previous is None:
+            previous = self.delta_writer.by_city.get(
+                city_key_for_link(self.city_link), []
+            )
+        for existing in previous:
+            if existing.name not in self.seen:
+                self._report("removed", existing)
+        return self.changes
+
+    def _report(self, change, record):
+        if self.delta_writer.write(change, self.city_link, record):
+            self.changes += 1
+
+
+class DeltaWriter:
+    """Write added, removed and changed lawyers against the consolidated dataset.
+
+    Lawyers are matched by name, the same key data_handling.py deduplicates on.
+    A lawyer counts as removed when the city's roster from its last crawl lists
+    them but the fresh listing no longer does. Cities crawled before rosters
+    were kept fall back to the consolidated dataset, which can only place
+    lawyers whose card shows "City, ST" rather than a street address.
+    """
+
+    def __init__(self, consolidated_file=CONSOLIDATED_FILE, output_file=None):
+        self.by_name = {}
+        self.by_city = {}
+        for record in iter_records([consolidated_file]):
+            self.by_name.setdefault(record.name, record)
+            key = city_key_for_address(record.address)
+            if key is not None:
+                self.by_city.setdefault(key, []).append(record)
+
+        if output_file is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_file = os.path.join(DELTA_DIRECTORY, f"delta_{timestamp}.csv")
+        os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+        self.output_file = output_file
+        self.reported = set()
+        self.lock = threading.Lock()
+
+        with open(self.output_file, mode="w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow(["Change", "City Link", *FIELDNAMES])
+
+    def start_city(self, city_link, previous=None):
+        return CityDelta(self, city_link, previous)
+
+    def write(self, change, city_link, record):
+        """Append one change, unless the same lawyer was already reported."""
+        with self.lock:
+            if (change, record.name) in self.reported:
+                return False
+            self.reported.add((change, record.name))
+            with open(self.output_file, mode="a", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow([change, city_link, *record.to_row()])
+        return True
@@ -0,0 +1,407 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from records import dedupe_records, iter_records, write_records
+from scheduling import CityCostModel, order_by_cost
+
+COORDINATOR_STATE_FILE = "coordinator_state.json"
+SHARD_DIRECTORY = "shards"
+LINKS_DIRECTORY = "links/"  # Written by scrape_links.py, same as the crawl
+MERGED_FILE = "final/coordinated_lawyer_data.csv"
+DEFAULT_PORT = 8800
+LEASE_SECONDS = 600  # A city goes back on the queue if its lease is not renewed
+RETRY_SECONDS = 10  # How long workers wait when every remaining city is leased
+MAX_ATTEMPTS = 3  # Failed crawls of a city before it is left out of the run
+REQUEST_RETRIES = 8  # Attempts per request, backing off 1, 2, 4... up to 60 s
+MAX_BACKOFF_SECONDS = 60
+
+
+def shard_name(link):
+    return f"{hashlib.md5(link.encode()).hexdigest()}.csv"
+
+
+class WorkQueue:
+    """City work units handed out as expiring leases, largest city first.
+
+    Completions are checkpointed to disk with their shard file, so a restarted
+    coordinator only hands out the cities that are still missing.
+    """
+
+    def __init__(self, links, cost_model, state_file=COORDINATOR_STATE_FILE):
+        self.state_file = state_file
+        self.cost_model = cost_model
+        self.lock = threading.Lock()
+        self.completed = self._load_state()
+        self.leases = {}
+        self.failures = Counter()
+        self.failed = []
+        default_cost = cost_model.state_default(links)
+        self.pending = order_by_cost(
+            (cost_model.estimate(link, default_cost), link)
+            for link in dict.fromkeys(links)
+            if link not in self.completed
+        )
+
+    def _load_state(self):
+        try:
+            with open(self.state_file, "r") as f:
+                return json.load(f)["completed"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return {}
+
+    def _save_state(self):
+        temp_file = f"{self.state_file}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump({"completed": self.completed}, f)
+        os.replace(temp_file, self.state_file)
+
+    def _reclaim_expired(self):
+        now = time.monotonic()
+        expired = [
+            lease_id
+            for lease_id, lease in self.leases.items()
+            if lease["expires"] < now
+        ]
+        for lease_id in expired:
+            lease = self.leases.pop(lease_id)
+            logging.warning(f"Lease expired for {lease['link']} ({lease['worker']})")
+            # Expired work is usually a big city, so put it back at the front
+            self.pending.insert(0, lease["link"])
+
+    def lease(self, worker):
+        with self.lock:
+            self._reclaim_expired()
+            if not self.pending:
+                if self.leases:
+                    return {"wait": RETRY_SECONDS}
+                return {"done": True}
+            link = self.pending.pop(0)
+            lease_id = uuid.uuid4().hex
+            self.leases[lease_id] = {
+                "link": link,
+                "worker": worker,
+                "expires": time.monotonic() + LEASE_SECONDS,
+            }
+            return {"lease": lease_id, "link": link, "lease_seconds": LEASE_SECONDS}
+
+    def lease_link(self, lease_id):
+        with self.lock:
+            lease = self.leases.get(lease_id)
+            return lease["link"] if lease is not None else None
+
+    def renew(self, lease_id):
+        with self.lock:
+            lease = self.leases.get(lease_id)
+            if lease is None:
+                return False
+            lease["expires"] = time.monotonic() + LEASE_SECONDS
+            return True
+
+    def release(self, lease_id):
+        """Take back a city its worker failed to crawl.
+
+        It is retried after the rest of the queue, and given up on after
+        MAX_ATTEMPTS failures so an unreachable city cannot keep the workers
+        busy forever. Failed cities are not checkpointed, so a restarted
+        coordinator tries them again.
+        """
+        with self.lock:
+            lease = self.leases.pop(lease_id, None)
+            if lease is None:
+                return
+            link = lease["link"]
+            self.failures[link] += 1
+            if self.failures[link] >= MAX_ATTEMPTS:
+                logging.error(f"Giving up on {link} after {MAX_ATTEMPTS} failures")
+                self.failed.append(link)
+            else:
+                self.pending.append(link)
+
+    def complete(self, lease_id, shard, pages=None, results=None):
+        with self.lock:
+            lease = self.leases.pop(lease_id, None)
+            if lease is None:
+                # Expired and handed to another worker; that one will report it
+                return False
+            link = lease["link"]
+            self.completed[link] = {
+                "shard": shard,
+                "worker": lease["worker"],
+                "pages": pages,
+                "results": results,
+            }
+            self._save_state()
+        self.cost_model.record(link, pages=pages, results=results)
+        return True
+
+    def status(self):
+        with self.lock:
+            return {
+                "pending": len(self.pending),
+                "leased": len(self.leases),
+                "completed": len(self.completed),
+                "failed": list(self.failed),
+                "leases": [
+                    {"link": lease["link"], "worker": lease["worker"]}
+                    for lease in self.leases.values()
+                ],
+            }
+
+
+class CoordinatorHandler(BaseHTTPRequestHandler):
+    """JSON endpoints: POST /lease, /renew, /release, /complete and GET /status."""
+
+    def _send(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/status":
+            self._send(self.server.queue.status())
+        else:
+            self._send({"error": "not found"}, 404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send({"error": "invalid JSON"}, 400)
+            return
+        if not isinstance(payload, dict):
+            self._send({"error": "expected a JSON object"}, 400)
+            return
+
+        queue = self.server.queue
+        try:
+            if self.path == "/lease":
+                self._send(queue.lease(payload.get("worker", "unknown")))
+            elif self.path == "/renew":
+                self._send({"ok": queue.renew(payload["lease"])})
+            elif self.path == "/release":
+                queue.release(payload["lease"])
+                self._send({"ok": True})
+            elif self.path == "/complete":
+                self._send({"ok": self._complete(queue, payload)})
+            else:
+                self._send({"error": "not found"}, 404)
+        except KeyError as e:
+            self._send({"error": f"missing field {e}"}, 400)
+
+    def _complete(self, queue, payload):
+        # The shard is named after the leased city, never the client's word
+        link = queue.lease_link(payload["lease"])
+        shard = payload["shard"]
+        if link is None:
+            return False
+        name = shard_name(link)
+        # Write under a lease-specific name so a late duplicate cannot clobber it
+        temp_path = os.path.join(self.server.shard_directory, f"{payload['lease']}.tmp")
+        with open(temp_path, "w", newline="", encoding="utf-8") as f:
+            f.write(shard)
+        if not queue.complete(
+            payload["lease"], name, payload.get("pages"), payload.get("results")
+        ):
+            os.remove(temp_path)
+            return False
+        os.replace(temp_path, os.path.join(self.server.shard_directory, name))
+        return True
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+
+def read_links(directory):
+    links = []
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".txt"):
+            with open(os.path.join(directory, filename), "r") as f:
+                links.extend(line.strip() for line in f if line.strip())
+    return links
+
+
+def make_server(
+    links,
+    host="0.0.0.0",
+    port=DEFAULT_PORT,
+    state_file=COORDINATOR_STATE_FILE,
+    shard_directory=SHARD_DIRECTORY,
+):
+    os.makedirs(shard_directory, exist_ok=True)
+    server = ThreadingHTTPServer((host, port), CoordinatorHandler)
+    server.queue = WorkQueue(links, CityCostModel(), state_file)
+    server.shard_directory = shard_directory
+    return server
+
+
+def serve(
+    links_directory=LINKS_DIRECTORY,
+    host="0.0.0.0",
+    port=DEFAULT_PORT,
+    state_file=COORDINATOR_STATE_FILE,
+    shard_directory=SHARD_DIRECTORY,
+):
+    server = make_server(
+        read_links(links_directory), host, port, state_file, shard_directory
+    )
+    queue = server.queue
+    logging.info(
+        f"Coordinator on {host}:{port}: {len(queue.pending)} cities pending,"
+        f" {len(queue.completed)} already completed"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def merge_shards(
+    state_file=COORDINATOR_STATE_FILE,
+    shard_directory=SHARD_DIRECTORY,
+    output_file=MERGED_FILE,
+):
+    """Merge completed shards into one CSV, independent of which worker did what.
+
+    Shards are read in city link order and deduplicated by name, so the same set
+    of completed cities always produces the same file.
+    """
+    with open(state_file, "r") as f:
+        completed = json.load(f)["completed"]
+    paths = [
+        os.path.join(shard_directory, completed[link]["shard"])
+        for link in sorted(completed)
+    ]
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    return write_records(dedupe_records(iter_records(paths)), output_file)
+
+
+class CoordinatorClient:
+    """What a crawl worker uses to talk to the coordinator."""
+
+    def __init__(self, url, worker):
+        self.url = url.rstrip("/")
+        self.worker = worker
+
+    def _post(self, path, payload, retries=REQUEST_RETRIES):
+        """POST JSON, retrying with backoff while the coordinator is unreachable.
+
+        About three minutes of retries covers a coordinator restart, which
+        resumes from its checkpoint. Client errors (4xx) are not retried.
+        """
+        request = urllib.request.Request(
+            f"{self.url}{path}",
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        for attempt in range(retries + 1):
+            try:
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    return json.loads(response.read())
+            except urllib.error.HTTPError as e:
+                if e.code < 500 or attempt == retries:
+                    raise
+                error = e
+            except OSError as e:
+                # URLError, refused or reset connections and timeouts
+                if attempt == retries:
+                    raise
+                error = e
+            backoff = min(MAX_BACKOFF_SECONDS, 2**attempt)
+            logging.warning(
+                f"Coordinator request {path} failed ({error}), retrying in {backoff}s"
+            )
+            time.sleep(backoff)
+
+    def lease(self):
+        """Return the next lease, waiting while other workers hold the rest.
+
+        Returns None once every city is complete.
+        """
+        while True:
+            response = self._post("/lease", {"worker": self.worker})
+            if response.get("done"):
+                return None
+            if "wait" in response:
+                time.sleep(response["wait"])
+                continue
+            return response
+
+    def release(self, lease):
+        self._post("/release", {"lease": lease["lease"]})
+
+    def complete(self, lease, shard, pages=None, results=None):
+        return self._post(
+            "/complete",
+            {
+                "lease": lease["lease"],
+                "link": lease["link"],
+                "shard": shard,
+                "pages": pages,
+                "results": results,
+            },
+        )["ok"]
+
+    @contextmanager
+    def heartbeat(self, lease):
+        """Keep renewing a lease while the city is being crawled."""
+        stop = threading.Event()
+
+        def renew():
+            while not stop.wait(lease["lease_seconds"] / 3):
+                try:
+                    # No retries: the next heartbeat is the retry
+                    self._post("/renew", {"lease": lease["lease"]}, retries=0)
+                except Exception as e:
+                    logging.warning(f"Failed to renew lease for {lease['link']}: {e}")
+
+        thread = threading.Thread(target=renew, name="heartbeat", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Coordinate crawl workers")
+    parser.add_argument("--state", default=COORDINATOR_STATE_FILE)
+    parser.add_argument("--shards", default=SHARD_DIRECTORY)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Hand out city leases")
+    serve_parser.add_argument("--links", default=LINKS_DIRECTORY)
+    serve_parser.add_argument("--host", default="0.0.0.0")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+
+    merge_parser = subparsers.add_parser("merge", help="Merge completed shards")
+    merge_parser.add_argument("--output", default=MERGED_FILE)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.links, args.host, args.port, args.state, args.shards)
+    else:
+        count = merge_shards(args.state, args.shards, args.output)
+        print(f"Merged {count} lawyers into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,691 @@
+import os
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import (
+    TimeoutException,
+    NoSuchElementException,
+    WebDriverException,
+)
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import time
+import csv
+import logging
+import json
+from datetime import datetime
+from urllib.parse import urlparse
+import hashlib
+import math
+import re
+import socket
+
+from enrichment import ProfileEnricher
+from profiling import CrawlProfiler
+from progress import CrawlProgress
+from records import FIELDNAMES, LawyerRecord
+from change_detection import CityFingerprints, DeltaWriter, fingerprint_page
+from coordinator import CoordinatorClient, shard_name
+from scheduling import (
+    LAWYERS_PER_PAGE,
+    CityCostModel,
+    order_by_cost,
+    build_work_queue,
+    drain_queue,
+)
+
+BASE_URL = "https://www.martindale.com/by-location/"
+OUTPUT_FILE_PREFIX = "lawyer_data_part"
+PART_SIZE = 5000  # Number of records per part
+
+PROCESSED_LINKS_FILE = "processed_links.json"
+SHARD_DIRECTORY = "data/shards"
+
+max_retries = 2
+NUM_WORKERS = 5
+
+LAWYER_CARD_SELECTOR = "div.medium-12.columns.card.card--attorney"
+
+RESULT_COUNT_PATTERN = re.compile(
+    r"of\s+([\d,]+)\s+(?:results|lawyers|attorneys)", re.IGNORECASE
+)
+
+
+def firefox_options():
+    options = webdriver.FirefoxOptions()
+    options.add_argument("--headless")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    # options.add_argument("--window-size=1920,1080")
+    return options
+
+
+class LinkTracker:
+    def __init__(self, filename=PROCESSED_LINKS_FILE):
+        self.filename = filename
+        self.processed_links = self._load_processed_links()
+
+    def _load_processed_links(self):
+        try:
+            with open(self.filename, "r") as f:
+                return set(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return set()
+
+    def _save_processed_links(self):
+        with open(self.filename, "w") as f:
+            json.dump(list(self.processed_links), f)
+
+    def is_processed(self, link):
+        return link in self.processed_links
+
+    def mark_processed(self, link):
+        self.processed_links.add(link)
+        self._save_processed_links()
+
+
+def get_output_file(part_number):
+    return f"data/{OUTPUT_FILE_PREFIX}_{part_number}.csv"
+
+
+def write_to_csv(data, part_number):
+    """Write scraped data to a CSV file."""
+    output_file = get_output_file(part_number)
+    with open(output_file, mode="a", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(data)
+
+
+def write_header(part_number):
+    output_file = get_output_file(part_number)
+    with open(output_file, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDNAMES)
+
+
+def read_result_count(driver):
+    """Read the total result count shown on a listing page, if it has one."""
+    try:
+        text = driver.find_element(By.TAG_NAME, "body").text
+    except NoSuchElementException:
+        return None
+    match = RESULT_COUNT_PATTERN.search(text)
+    return int(match.group(1).replace(",", "")) if match else None
+
+
+class CityLogger:
+    def __init__(self, city_url):
+        parsed_url = urlparse(city_url)
+        city_path = parsed_url.path
+        url_hash = hashlib.md5(city_url.encode()).hexdigest()[:8]
+
+        city_name = (
+            city_path.split("/")[-2]
+            if city_path.endswith("/")
+            else city_path.split("/")[-1]
+        )
+        city_name = city_name.replace("-lawyers", "").replace("-law-firms", "")
+
+        self.logger = logging.getLogger(f"city_{url_hash}")
+        if not self.logger.handlers:
+            self.logger.setLevel(logging.INFO)
+
+            # File handler (logs to file)
+            os.makedirs("logs/cities", exist_ok=True)
+            log_file = f"logs/cities/{city_name}_{url_hash}.log"
+            self.file_handler = logging.FileHandler(log_file, encoding="utf-8")
+            self.file_handler.setLevel(logging.INFO)
+
+            # Stream handler (logs to terminal)
+            self.stream_handler = logging.StreamHandler()
+            self.stream_handler.setLevel(logging.INFO)
+
+            # Create formatter and add it to the handlers
+            formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+            self.file_handler.setFormatter(formatter)
+            self.stream_handler.setFormatter(formatter)
+
+            # Add both handlers to the logger
+            self.logger.addHandler(self.file_handler)
+            self.logger.addHandler(self.stream_handler)
+
+            # Keep propagate=False since we're handling console output ourselves
+            self.logger.propagate = False
+
+    def __enter__(self):
+        return self.logger
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.file_handler.close()
+        self.logger.removeHandler(self.file_handler)
+        self.logger.removeHandler(self.stream_handler)
+
+
+def read_page_fingerprint(driver):
+    """Fingerprint the listing page the driver is currently on."""
+    cards = driver.find_elements(By.CSS_SELECTOR, LAWYER_CARD_SELECTOR)
+    return fingerprint_page(read_result_count(driver), [card.text for card in cards])
+
+
+class CityProcessor:
+    def __init__(
+        self,
+        city_url,
+        part_number,
+        record_count,
+        enricher=None,
+        progress=None,
+        shard_writer=None,
+    ):
+        self.city_url = city_url
+        self.enricher = enricher
+        self.progress = progress
+        self.shard_writer = shard_writer
+        self.part_number = part_number
+        self.record_count = record_count
+        self.city_delta = None
+        self.roster = None
+        self.total_lawyers_processed = 0
+        self.pages_processed = 0
+        self.result_count = None
+        self.reached_last_page = False
+        self.start_time = None
+        self.end_time = None
+        self.city_logger = CityLogger(city_url)
+
+    def log_start(self):
+        self.start_time = datetime.now()
+        self.logger.info(f"Started processing city: {self.city_url}")
+
+    def log_completion(self):
+        self.end_time = datetime.now()
+        duration = self.end_time - self.start_time
+        self.logger.info(f"Completed processing city: {self.city_url}")
+        self.logger.info(f"Total lawyers processed: {self.total_lawyers_processed}")
+        self.logger.info(f"Processing duration: {duration}")
+
+    def log_error(self, error_msg):
+        self.logger.error(f"Error processing city {self.city_url}: {error_msg}")
+
+    def iter_page_records(self, driver, logger):
+        """Yield a LawyerRecord for each lawyer card on the current page."""
+        lawyers = driver.find_elements(By.CSS_SELECTOR, LAWYER_CARD_SELECTOR)
+
+        for lawyer in lawyers:
+            try:
+                profile_link = lawyer.find_element(
+                    By.CSS_SELECTOR, "li.detail_title > a"
+                )
+                name = profile_link.find_element(By.TAG_NAME, "h3").text
+                profile_url = profile_link.get_attribute("href") or ""
+                try:
+                    company_info = lawyer.find_element(
+                        By.CSS_SELECTOR, "li.detail_position"
+                    ).text
+                except NoSuchElementException:
+                    logger.warning(f"No company info found for lawyer: {name}")
+                    continue
+
+                if " at " in company_info:
+                    position, company_name = company_info.split(" at ", 1)
+                else:
+                    position = ""
+                    company_name = company_info
+
+                try:
+                    address = lawyer.find_element(
+                        By.CSS_SELECTOR, "li.detail_location"
+                    ).text
+                except NoSuchElementException:
+                    address = ""
+                    logger.debug(f"No address found for lawyer: {name}")
+
+                try:
+                    phone_element = lawyer.find_element(
+                        By.CSS_SELECTOR, "a.webstats-phone-click"
+                    )
+                    phone = (
+                        phone_element.get_attribute("href").replace("tel:", "")
+                        if phone_element.get_attribute("href")
+                        else ""
+                    )
+                except NoSuchElementException:
+                    phone = ""
+                    logger.debug(f"No phone found for lawyer: {name}")
+
+                try:
+                    website_element = lawyer.find_element(
+                        By.CSS_SELECTOR, "a.webstats-website-click"
+                    )
+                    website = (
+                        website_element.get_attribute("href")
+                        if website_element.get_attribute("href")
+                        else ""
+                    )
+                except NoSuchElementException:
+                    website = ""
+                    logger.debug(f"No website found for lawyer: {name}")
+
+                yield LawyerRecord.create(
+                    name, company_name, position, address, phone, website, profile_url
+                )
+
+            except Exception as e:
+                logger.error(f"Error processing lawyer element: {e}", exc_info=True)
+
+    def write_record(self, record):
+        """Send one lawyer to the output file and the optional consumers."""
+        # Coordinated workers write one shard per city instead of parts
+        if self.shard_writer is not None:
+            self.shard_writer.writerow(record.to_row())
+        else:
+            write_to_csv(record.to_row(), self.part_number)
+            self.record_count += 1
+            if self.record_count >= PART_SIZE:
+                self.part_number += 1
+                self.record_count = 0
+                write_header(self.part_number)
+
+        if self.roster is not None:
+            self.roster.add(record)
+        if self.city_delta is not None:
+            self.city_delta.add(record)
+        if self.enricher is not None:
+            self.enricher.submit(record.profile_url)
+
+    def fetch_lawyer_details(self, driver):
+        """Extract details of lawyers from the current city page."""
+        with self.city_logger as logger:
+            count = 0
+
+            for record in self.iter_page_records(driver, logger):
+                logger.debug(f"Processing lawyer: {record.name}")
+                try:
+                    self.write_record(record)
+                except Exception as e:
+                    logger.error(
+                        f"Error saving lawyer {record.name}: {e}", exc_info=True
+                    )
+                    continue
+                count += 1
+                self.total_lawyers_processed += 1
+
+            return count, self.part_number, self.record_count
+
+    def navigate_pagination(self, driver):
+        """Handle pagination and fetch lawyer details from all pages."""
+        with self.city_logger as logger:
+            page_number = 1
+            while True:
+                logger.info(f"Processing page {page_number}")
+                self.pages_processed = page_number
+                try:
+                    new_count, self.part_number, self.record_count = (
+                        self.fetch_lawyer_details(driver)
+                    )
+                    logger.info(f"Processed {new_count} lawyers on page {page_number}")
+                    if self.progress is not None:
+                        self.progress.page_done(new_count)
+
+                    try:
+                        wait = WebDriverWait(driver, 2)
+                        next_button = wait.until(
+                            EC.element_to_be_clickable(
+                                (
+                                    By.CSS_SELECTOR,
+                                    "ul.inline-list.right.pagination a[rel='next']",
+                                )
+                            )
+                        )
+
+                        if "unavailable" in next_button.get_attribute("class"):
+                            logger.info("Reached last page")
+                            self.reached_last_page = True
+                            break
+
+                        next_button.click()
+                        logger.info(f"Navigating to page {page_number + 1}")
+                        time.sleep(2)
+                        page_number += 1
+
+                    except (NoSuchElementException, TimeoutException) as e:
+                        # Single-page cities have no pagination links at all.
+                        # Further in, a missing button only ends the city when
+                        # the result count says this is its last page.
+                        if self.result_count:
+                            expected_pages = math.ceil(
+                                self.result_count / LAWYERS_PER_PAGE
+                            )
+                            self.reached_last_page = page_number >= expected_pages
+                        else:
+                            self.reached_last_page = page_number == 1
+                        if not self.reached_last_page:
+                            logger.error(
+                                f"Error with pagination on page {page_number},"
+                                f" city incomplete: {e}"
+                            )
+                        break
+
+                except Exception as e:
+                    logger.error(
+                        f"Error processing page {page_number}: {e}", exc_info=True
+                    )
+                    break
+
+            return self.part_number, self.record_count
+
+    def process_city(self, driver, fingerprints=None, delta_writer=None):
+        """Crawl every page of the city.
+
+        The first page is fingerprinted for later refreshes, but only stored once
+        pagination reaches the last page. With a delta writer (refresh mode) it
+        is compared against the last run first, and the rest of the pagination
+        is skipped when nothing has changed.
+        """
+        with self.city_logger as logger:
+            self.start_time = datetime.now()
+            logger.info(f"Started processing city: {self.city_url}")
+
+            try:
+                driver.get(self.city_url)
+                time.sleep(2)
+                self.result_count = read_result_count(driver)
+
+                if fingerprints is not None:
+                    fingerprint = read_page_fingerprint(driver)
+                    if delta_writer is not None and fingerprints.is_unchanged(
+                        self.city_url, fingerprint
+                    ):
+                        logger.info(f"First page unchanged, skipping: {self.city_url}")
+                        return self.part_number, self.record_count
+
+                    self.roster = fingerprints.start_roster(self.city_url)
+                if delta_writer is not None:
+                    previous = (
+                        fingerprints.roster(self.city_url) if fingerprints else None
+                    )
+                    self.city_delta = delta_writer.start_city(self.city_url, previous)
+
+                self.part_number, self.record_count = self.navigate_pagination(driver)
+
+                # A partial crawl would hide the rest of the city from every
+                # later refresh and report its unseen lawyers as removed
+                if not self.reached_last_page:
+                    logger.warning(
+                        "Pagination stopped early, not updating the fingerprint"
+                    )
+                else:
+                    if self.city_delta is not None:
+                        changes = self.city_delta.close()
+                        logger.info(f"Changes against consolidated data: {changes}")
+                    if fingerprints is not None:
+                        self.roster.commit()
+                        fingerprints.update(self.city_url, fingerprint)
+
+                self.end_time = datetime.now()
+                duration = self.end_time - self.start_time
+                logger.info(f"Completed processing city: {self.city_url}")
+                logger.info(f"Total lawyers processed: {self.total_lawyers_processed}")
+                logger.info(f"Processing duration: {duration}")
+
+            except WebDriverException as e:
+                logger.error(f"WebDriver error: {e}")
+            except Exception as e:
+                logger.error(f"Unexpected error: {e}")
+            finally:
+                if self.roster is not None:
+                    self.roster.close()
+
+            return self.part_number, self.record_count
+
+
+def process_city_links(
+    driver,
+    city_links,
+    link_tracker,
+    cost_model=None,
+    fingerprints=None,
+    delta_writer=None,
+    enricher=None,
+    progress=None,
+    profiler=None,
+):
+    """Iterate over all city links and fetch lawyer data."""
+    part_number = 8
+    record_count = 0
+    refresh = delta_writer is not None
+    worker_progress = progress.worker() if progress is not None else None
+
+    for city_link in city_links:
+        if not refresh and link_tracker.is_processed(city_link):
+            continue
+
+        if worker_progress is not None:
+            worker_progress.start_city(city_link)
+        processor = CityProcessor(
+            city_link,
+            part_number,
+            record_count,
+            enricher=enricher,
+            progress=worker_progress,
+        )
+        with profiler.profile_city(city_link) if profiler else nullcontext():
+            part_number, record_count = processor.process_city(
+                driver, fingerprints, delta_writer
+            )
+        link_tracker.mark_processed(city_link)
+        if worker_progress is not None:
+            worker_progress.finish_city(city_link)
+        if cost_model is not None:
+            cost_model.record(
+                city_link,
+                pages=processor.pages_processed,
+                results=processor.result_count,
+            )
+
+    if worker_progress is not None:
+        worker_progress.finish()
+
+
+def process_coordinated_links(
+    driver, client, enricher=None, progress=None, profiler=None
+):
+    """Crawl cities leased from a coordinator until it has none left.
+
+    A city that fails or stops before its last page is handed back and the
+    worker moves on to its next lease. The client retries coordinator requests
+    with backoff, so only an outage longer than its retries ends the worker.
+    """
+    os.makedirs(SHARD_DIRECTORY, exist_ok=True)
+    worker_progress = progress.worker() if progress is not None else None
+
+    while True:
+        lease = client.lease()
+        if lease is None:
+            if worker_progress is not None:
+                worker_progress.finish()
+            return
+        city_link = lease["link"]
+        if worker_progress is not None:
+            worker_progress.start_city(city_link)
+        shard_path = os.path.join(SHARD_DIRECTORY, shard_name(city_link))
+
+        try:
+            with open(shard_path, mode="w", newline="", encoding="utf-8") as file:
+                shard_writer = csv.writer(file)
+                shard_writer.writerow(FIELDNAMES)
+                processor = CityProcessor(
+                    city_link,
+                    0,
+                    0,
+                    enricher=enricher,
+                    progress=worker_progress,
+                    shard_writer=shard_writer,
+                )
+                profile = (
+                    profiler.profile_city(city_link) if profiler else nullcontext()
+                )
+                with client.heartbeat(lease), profile:
+                    processor.process_city(driver)
+
+            # process_city logs its own errors and returns what it got so far,
+            # which must not be reported as the whole city
+            if not processor.reached_last_page:
+                raise RuntimeError("crawl stopped before the last page")
+            with open(shard_path, "r", encoding="utf-8") as file:
+                client.complete(
+                    lease,
+                    file.read(),
+                    pages=processor.pages_processed,
+                    results=processor.result_count,
+                )
+            if worker_progress is not None:
+                worker_progress.finish_city(city_link)
+        except Exception as e:
+            logging.error(f"Error in coordinated crawl of {city_link}: {e}")
+            try:
+                client.release(lease)
+            except Exception as release_error:
+                # The lease expires on its own and the city is handed out again
+                logging.error(f"Failed to release {city_link}: {release_error}")
+
+
+def run_worker(coordinator_url, enrich=False):
+    """Run NUM_WORKERS browsers against a coordinator (see coordinator.py)."""
+    enricher = ProfileEnricher() if enrich else None
+    profiler = CrawlProfiler()
+    profiler.install_signal_handler()
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    # The coordinator owns the city list, so this process reports its own
+    # throughput and stalls but has no total to estimate an ETA from
+    progress = CrawlProgress({})
+    progress.start()
+
+    drivers = []
+    try:
+        with ThreadPoolExecutor(
+            max_workers=NUM_WORKERS, thread_name_prefix="worker"
+        ) as executor:
+            options = firefox_options()
+            for _ in range(NUM_WORKERS):
+                drivers.append(webdriver.Firefox(options=options))
+            futures = [
+                executor.submit(
+                    process_coordinated_links,
+                    driver,
+                    CoordinatorClient(coordinator_url, f"{worker_id}-{i}"),
+                    enricher,
+                    progress,
+                    profiler,
+                )
+                for i, driver in enumerate(drivers)
+            ]
+            # One worker losing the coordinator should not stop the others
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Coordinated worker stopped: {e}")
+    finally:
+        for driver in drivers:
+            driver.quit()
+        progress.stop()
+
+    if enricher is not None:
+        enricher.close()
+
+
+def read_city_links(file_path):
+    with open(file_path, "r") as file:
+        return [line.strip() for line in file.readlines()]
+
+
+def process_state_links(directory, refresh=False, enrich=False):
+    """Process all city links from text files in the given directory.
+
+    Cities from every state file are pooled and handed out most expensive first,
+    so large metros start early and small towns fill the gaps at the end.
+
+    In refresh mode every city is revisited, but only cities whose first page
+    changed since the last run are paginated, and the differences are written
+    to a delta file against the consolidated dataset.
+
+    With enrich, each lawyer's profile page is fetched in the background by a
+    separate, bounded pool and cached under cache/profiles/.
+
+    Set SCRAPER_PROFILE=sample|cprofile or send SIGUSR1 to profile cities into
+    logs/profiles/ while the crawl runs.
+    """
+    link_tracker = LinkTracker()
+    cost_model = CityCostModel()
+    fingerprints = CityFingerprints()
+    delta_writer = DeltaWriter() if refresh else None
+    enricher = ProfileEnricher() if enrich else None
+    profiler = CrawlProfiler()
+    profiler.install_signal_handler()
+
+    work = {}
+    state_of = {}
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".txt"):
+            file_path = os.path.join(directory, filename)
+            city_links = [link for link in read_city_links(file_path) if link]
+            logging.info(f"Processing file: {filename}")
+
+            # Filter out already processed links
+            remaining_links = [
+                link
+                for link in city_links
+                if refresh or not link_tracker.is_processed(link)
+            ]
+            if not remaining_links:
+                logging.info(f"All links in {filename} have been processed. Skipping.")
+                continue
+
+            default_cost = cost_model.state_default(city_links)
+            for link in remaining_links:
+                work[link] = cost_model.estimate(link, default_cost)
+                state_of[link] = filename[: -len(".txt")]
+
+    if not work:
+        return
+
+    queue = build_work_queue(order_by_cost((cost, link) for link, cost in work.items()))
+    logging.info(f"Queued {len(work)} cities, largest first")
+    progress = CrawlProgress(state_of, work)
+    progress.start()
+
+    drivers = []
+    try:
+        with ThreadPoolExecutor(
+            max_workers=NUM_WORKERS, thread_name_prefix="worker"
+        ) as executor:
+            options = firefox_options()
+            for _ in range(NUM_WORKERS):
+                drivers.append(webdriver.Firefox(options=options))
+            futures = [
+                executor.submit(
+                    process_city_links,
+                    driver,
+                    drain_queue(queue),
+                    link_tracker,
+                    cost_model,
+                    fingerprints,
+                    delta_writer,
+                    enricher,
+                    progress,
+                    profiler,
+                )
+                for driver in drivers
+            ]
+            for future in futures:
+                future.result()
+    finally:
+        for driver in drivers:
+            driver.quit()
+        progress.stop()
+
+    if enricher is not None:
+        enricher.close()
@@ -2,6 +2,42 @@ import pandas as pd
 import os
 from pathlib import Path
 
+from enrichment import load_profile_cache
+from records import dedupe_records, iter_records, write_records
+from us_states import ADDRESS_PATTERN
+
+# Arrow strings run .str.extract/.replace in pyarrow's regex kernels instead of
+# looping over rows in Python, so use them when pyarrow is installed
+try:
+    import pyarrow as pa
+    STRING_DTYPE = pd.ArrowDtype(pa.string())
+except ImportError:
+    STRING_DTYPE = 'string'
+
+WEBSITE_DOMAIN_PATTERN = (
+    r'^(?:[A-Za-z][A-Za-z0-9+.-]*://)?(?:www\.)?(?P<domain>[^/:?#]+)'
+)
+FIRM_SUFFIX_PATTERN = (
+    r'^(?P<base>.*?)[,\s]+'
+    r'(?P<suffix>P\.?\s?L\.?\s?L\.?\s?C\.?|P\.?\s?L\.?\s?C\.?'
+    r'|L\.?\s?L\.?\s?[CP]\.?|P\.?\s?[CA]\.?|L\.?\s?P\.?|S\.?\s?C\.?|Inc\.?)$'
+)
+FIRM_SUFFIXES = {
+    'PLLC': 'PLLC',
+    'PLC': 'PLC',
+    'LLC': 'LLC',
+    'LLP': 'LLP',
+    'PC': 'P.C.',
+    'PA': 'P.A.',
+    'LP': 'LP',
+    'SC': 'S.C.',
+    'INC': 'Inc.',
+}
+# Judicial titles like "Dist. J." or "Cir.J." that end up in the firm column
+JUDGE_TITLE_PATTERN = r'\bJ\.$'
+
+NORMALIZED_CSV_PATH = 'final/normalized_lawyer_data.csv'
+
 def deduplicate_names(file_path):
     #Process CSV file to identify and handle duplicate names.
     
@@ -21,50 +57,126 @@ def deduplicate_names(file_path):
 
 #df_clean, stats = deduplicate_names('data/lawyer_data_part_6.csv')
 
+def normalize_lawyer_data(df):
+    # Add parsed and canonical columns next to the raw scraped ones.
+    # Everything here is a whole-column string operation, no per-row Python.
+    out = df.copy()
+    text = {
+        column: out[column].astype(STRING_DTYPE).fillna('').str.strip()
+        for column in ['Name', 'Company Name', 'Company Position', 'Address',
+                       'Phone Number', 'Website']
+    }
+
+    # "Birmingham, AL" gives a city, "403 Choccolocco St., AL 36203" a street and ZIP
+    address = text['Address'].str.extract(ADDRESS_PATTERN.pattern)
+    address = address.fillna('')
+    matched = address['state'] != ''
+    has_zip = address['zip'] != ''
+    prefix = address['prefix']
+    out['Street'] = prefix.where(has_zip, '').where(matched, text['Address'])
+    out['City'] = prefix.where(~has_zip, '')
+    out['State'] = address['state']
+    # ZIP+4 is kept in its dashed form, "88240-4403"
+    out['ZIP'] = address['zip'].where(
+        address['zip4'] == '', address['zip'] + '-' + address['zip4']
+    )
+
+    # E.164 for ten-digit US numbers, with or without a leading country code
+    digits = text['Phone Number'].str.replace(r'\D', '', regex=True)
+    digits = digits.where(~((digits.str.len() == 11) & digits.str.startswith('1')),
+                          digits.str.slice(1))
+    out['Phone E164'] = ('+1' + digits).where(digits.str.len() == 10, '')
+
+    out['Website Domain'] = (
+        text['Website'].str.extract(WEBSITE_DOMAIN_PATTERN, expand=False)
+        .fillna('').str.lower()
+    )
+
+    # Canonical suffixes so "P. C.", "PC" and "P.C." all compare equal
+    firm = text['Company Name'].str.replace(r'\s+', ' ', regex=True)
+    firm_parts = firm.str.extract(FIRM_SUFFIX_PATTERN)
+    suffix_key = (
+        firm_parts['suffix'].str.replace(r'[.\s]', '', regex=True).str.upper()
+    )
+    suffix = suffix_key.map(FIRM_SUFFIXES, na_action='ignore').astype(STRING_DTYPE)
+    out['Firm Suffix'] = suffix.fillna('')
+    out['Firm'] = (firm_parts['base'] + ', ' + suffix).fillna(firm)
+
+    # Cards without " at " put the whole position line in the firm column, so a
+    # bare "Member" or "Dist. J." there is really a position with no firm
+    position = text['Company Position'].str.replace(r'\s+', ' ', regex=True)
+    known_positions = position[position != ''].unique()
+    misplaced = (position == '') & (
+        firm.isin(known_positions) | firm.str.contains(JUDGE_TITLE_PATTERN, regex=True)
+    )
+    out['Position'] = position.where(~misplaced, firm)
+    out['Firm'] = out['Firm'].where(~misplaced, '')
+    out.loc[misplaced, 'Firm Suffix'] = ''
+
+    return out
+
+
+def attach_profiles(df, cache_dir='cache/profiles'):
+    # Join cached profile page fields onto the records by their profile link
+    profiles = pd.DataFrame(load_profile_cache(cache_dir))
+    if profiles.empty or 'Profile URL' not in df.columns:
+        return df
+    profiles = profiles.drop_duplicates(subset=['Profile URL'])
+    return df.merge(profiles, on='Profile URL', how='left')
+
+
 def combine_csv_files(directory='final/'):
     # Find all CSV files
-    csv_files = list(Path(directory).glob('*.csv'))
+    csv_files = [
+        file for file in Path(directory).glob('*.csv')
+        if file.as_posix() != NORMALIZED_CSV_PATH
+    ]
     print(csv_files)
     if not csv_files:
         raise FileNotFoundError(f"No CSV files found in {directory}")
     
-    # read and combine all CSV files
-    dfs = []
+    # Stream every record through the name dedup straight into the final CSV,
+    # so only the current record and the set of seen names are held in memory.
+    # The final CSV is one of the inputs, so write next to it and swap at the end.
     total_records = 0
-    
-    for file in csv_files:
-        print(file)
-        df = pd.read_csv(file.__str__(), engine='python')
-        total_records += len(df)
-        dfs.append(df)
-    
-    combined_df = pd.concat(dfs, ignore_index=True)
-    
-    unique_df = combined_df.drop_duplicates(subset=['Name'], keep='first')
-    
-    # Save combined data
+
+    def counted(records):
+        nonlocal total_records
+        for record in records:
+            total_records += 1
+            yield record
+
     output_csv_path = 'final/final_lawyer_data.csv'
-    unique_df.to_csv(output_csv_path, index=False)
+    final_records = write_records(
+        dedupe_records(counted(iter_records(csv_files))), output_csv_path + '.tmp'
+    )
+    os.replace(output_csv_path + '.tmp', output_csv_path)
+
+    # Excel and normalized exports are built from the deduplicated file
+    unique_df = pd.read_csv(output_csv_path, dtype=STRING_DTYPE, keep_default_na=False)
+    unique_df = attach_profiles(unique_df)
     output_excel_path = 'final/final_lawyer_data.xlsx'
     unique_df.to_excel(output_excel_path, index=False)
+    normalize_lawyer_data(unique_df).to_csv(NORMALIZED_CSV_PATH, index=False)
     
     
     stats = {
         'total_records': total_records,
         'files_processed': len(csv_files),
-        'final_records': len(unique_df),
-        'duplicates_removed': total_records - len(unique_df)
+        'final_records': final_records,
+        'duplicates_removed': total_records - final_records
     }
     
     return output_excel_path, stats
 
 
-try:
-    output_file, stats = combine_csv_files()
-    print(f"Files processed: {stats['files_processed']}")
-    print(f"Total records: {stats['total_records']}")
-    print(f"Final records: {stats['final_records']}")
-    print(f"Duplicates removed: {stats['duplicates_removed']}")
-    print(f"Combined file saved to: {output_file}")
-except Exception as e:
-    print(f"Error: {str(e)}")
\ No newline at end of file
+if __name__ == '__main__':
+    try:
+        output_file, stats = combine_csv_files()
+        print(f"Files processed: {stats['files_processed']}")
+        print(f"Total records: {stats['total_records']}")
+        print(f"Final records: {stats['final_records']}")
+        print(f"Duplicates removed: {stats['duplicates_removed']}")
+        print(f"Combined file saved to: {output_file}")
+    except Exception as e:
+        print(f"Error: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+
+PROFILE_CACHE_DIRECTORY = "cache/profiles"
+PROFILE_WORKERS = 4  # Own pool, separate from the Firefox drivers
+PROFILE_FETCH_DELAY = 1  # Seconds each profile worker waits between requests
+PROFILE_TIMEOUT = 15
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0"
+
+PROFILE_FIELDS = [
+    "Profile URL",
+    "Profile Address",
+    "Profile Street",
+    "Profile City",
+    "Profile State",
+    "Profile ZIP",
+    "Profile Phone",
+    "Profile Website",
+    "Practice Areas",
+]
+
+
+class _JsonLdParser(HTMLParser):
+    """Collect the contents of <script type="application/ld+json"> blocks."""
+
+    def __init__(self):
+        super().__init__()
+        self.blocks = []
+        self._in_json_ld = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "script" and dict(attrs).get("type") == "application/ld+json":
+            self._in_json_ld = True
+            self.blocks.append("")
+
+    def handle_endtag(self, tag):
+        if tag == "script":
+            self._in_json_ld = False
+
+    def handle_data(self, data):
+        if self._in_json_ld:
+            self.blocks[-1] += data
+
+
+def _json_ld_objects(html):
+    parser = _JsonLdParser()
+    parser.feed(html)
+    for block in parser.blocks:
+        try:
+            data = json.loads(block)
+        except json.JSONDecodeError:
+            continue
+        stack = data if isinstance(data, list) else [data]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, dict):
+                yield item
+                stack.extend(item.get("@graph", []))
+
+
+def parse_profile(html, profile_url):
+    """Pull the full address and contact details out of a profile page's JSON-LD."""
+    profile = {field: "" for field in PROFILE_FIELDS}
+    profile["Profile URL"] = profile_url
+
+    for item in _json_ld_objects(html):
+        address = item.get("address")
+        if isinstance(address, list):
+            address = address[0] if address else None
+        if not isinstance(address, dict):
+            continue
+
+        profile["Profile Street"] = address.get("streetAddress", "")
+        profile["Profile City"] = address.get("addressLocality", "")
+        profile["Profile State"] = address.get("addressRegion", "")
+        profile["Profile ZIP"] = address.get("postalCode", "")
+        profile["Profile Address"] = ", ".join(
+            part
+            for part in (
+                profile["Profile Street"],
+                profile["Profile City"],
+                f"{profile['Profile State']} {profile['Profile ZIP']}".strip(),
+            )
+            if part
+        )
+        profile["Profile Phone"] = item.get("telephone", "")
+        profile["Profile Website"] = item.get("url", "")
+        knows_about = item.get("knowsAbout", [])
+        if isinstance(knows_about, str):
+            knows_about = [knows_about]
+        profile["Practice Areas"] = "; ".join(
+            area if isinstance(area, str) else area.get("name", "")
+            for area in knows_about
+        )
+        break
+
+    return profile
+
+
+def profile_cache_path(profile_url, cache_dir=PROFILE_CACHE_DIRECTORY):
+    url_hash = hashlib.sha1(profile_url.encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{url_hash}.json")
+
+
+def load_profile_cache(cache_dir=PROFILE_CACHE_DIRECTORY):
+    """Return every cached profile as a list of dicts."""
+    if not os.path.isdir(cache_dir):
+        return []
+    profiles = []
+    for filename in os.listdir(cache_dir):
+        if filename.endswith(".json"):
+            with open(os.path.join(cache_dir, filename), "r", encoding="utf-8") as f:
+                profiles.append(json.load(f))
+    return profiles
+
+
+class ProfileEnricher:
+    """Fetch lawyer profile pages in the background and cache them on disk.
+
+    submit() only does an in-memory dedup check and hands the URL to a small
+    thread pool of plain HTTP fetches, so the listing crawl never blocks on it.
+    The same lawyer shows up in many cities, so each profile URL is fetched at
+    most once per run, and not at all if it is already cached.
+    """
+
+    def __init__(
+        self,
+        cache_dir=PROFILE_CACHE_DIRECTORY,
+        max_workers=PROFILE_WORKERS,
+        delay=PROFILE_FETCH_DELAY,
+        timeout=PROFILE_TIMEOUT,
+    ):
+        self.cache_dir = cache_dir
+        self.delay = delay
+        self.timeout = timeout
+        self.seen = set()
+        self.lock = threading.Lock()
+        self.fetched = 0
+        self.failed = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="profile"
+        )
+
+    def submit(self, profile_url):
+        if not profile_url:
+            return
+        with self.lock:
+            if profile_url in self.seen:
+                return
+            self.seen.add(profile_url)
+        self.executor.submit(self._fetch, profile_url)
+
+    def _fetch(self, profile_url):
+        cache_path = profile_cache_path(profile_url, self.cache_dir)
+        if os.path.exists(cache_path):
+            return
+
+        try:
+            request = urllib.request.Request(
+                profile_url, headers={"User-Agent": USER_AGENT}
+            )
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                html = response.read().decode("utf-8", errors="replace")
+        except Exception as e:
+            logging.warning(f"Failed to fetch profile {profile_url}: {e}")
+            with self.lock:
+                self.failed += 1
+            return
+        finally:
+            time.sleep(self.delay)
+
+        profile = parse_profile(html, profile_url)
+        temp_path = f"{cache_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(profile, f)
+        os.replace(temp_path, cache_path)
+        with self.lock:
+            self.fetched += 1
+
+    def close(self):
+        """Wait for the queued profile fetches to finish."""
+        self.executor.shutdown(wait=True)
+        logging.info(
+            f"Profiles fetched: {self.fetched}, failed: {self.failed},"
+            f" unique profile links: {len(self.seen)}"
+        )
@@ -0,0 +1,162 @@
+import cProfile
+import hashlib
+import logging
+import os
+import pstats
+import signal
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+PROFILE_MODE_ENV = "SCRAPER_PROFILE"  # "sample" or "cprofile"
+PROFILE_CITY_ENV = "SCRAPER_PROFILE_CITY"  # Only profile links containing this
+PROFILE_WORKER_ENV = "SCRAPER_PROFILE_WORKER"  # Only profile this thread, e.g. worker_0
+PROFILE_DIRECTORY = "logs/profiles"
+SAMPLE_INTERVAL = 0.005  # Seconds between stack samples
+
+
+def _city_file_stem(city_url):
+    url_hash = hashlib.md5(city_url.encode()).hexdigest()[:8]
+    parts = [part for part in city_url.rstrip("/").split("/") if part]
+    city_name = "_".join(parts[-2:]) if len(parts) >= 2 else "city"
+    return f"{city_name}_{url_hash}"
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}".replace(" ", "_")
+
+
+class StackSampler:
+    """Sample one thread's Python stack on a background thread.
+
+    Stacks are kept as collapsed "outer;inner;leaf" strings with hit counts,
+    the input format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+
+
+class CrawlProfiler:
+    """Opt-in per-city profiling of the crawl workers.
+
+    Switched on by the SCRAPER_PROFILE environment variable, or by sending the
+    process SIGUSR1, which toggles it while the crawl keeps running. When off,
+    profile_city() costs a single attribute check per city.
+
+    cProfile runs on one city at a time: from Python 3.12 it is built on
+    sys.monitoring, which allows a single active profiler per process, so
+    cities that start while another is being profiled run unprofiled.
+    """
+
+    def __init__(self, directory=PROFILE_DIRECTORY):
+        self.directory = directory
+        self.mode = os.environ.get(PROFILE_MODE_ENV) or None
+        self.city_filter = os.environ.get(PROFILE_CITY_ENV)
+        self.worker_filter = os.environ.get(PROFILE_WORKER_ENV)
+        self.lock = threading.Lock()
+        self.cprofile_lock = threading.Lock()
+        self.merged_stacks = Counter()
+        self.merged_stats = None
+
+    def install_signal_handler(self):
+        """Toggle sampling with SIGUSR1 (must be called from the main thread)."""
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, self._toggle)
+
+    def _toggle(self, signum, frame):
+        self.mode = None if self.mode else "sample"
+        logging.info(f"Profiling {'enabled' if self.mode else 'disabled'}")
+
+    def profile_city(self, city_url):
+        mode = self.mode
+        if not mode:
+            return nullcontext()
+        if self.city_filter and self.city_filter not in city_url:
+            return nullcontext()
+        worker = threading.current_thread().name
+        if self.worker_filter and self.worker_filter != worker:
+            return nullcontext()
+        if mode == "cprofile":
+            if not self.cprofile_lock.acquire(blocking=False):
+                return nullcontext()
+            return self._cprofile_city(city_url)
+        return self._sample_city(city_url)
+
+    @contextmanager
+    def _sample_city(self, city_url):
+        sampler = StackSampler(threading.get_ident())
+        try:
+            with sampler:
+                yield
+        finally:
+            self._write_stacks(city_url, sampler.stacks)
+
+    @contextmanager
+    def _cprofile_city(self, city_url):
+        # Called with cprofile_lock held. Before 3.12 the profile only covers
+        # this worker's thread; from 3.12 it can also pick up other threads
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Another profiler (e.g. a debugger) already owns sys.monitoring
+            self.cprofile_lock.release()
+            logging.warning(f"Not profiling {city_url}: {e}")
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self.cprofile_lock.release()
+            self._write_stats(city_url, profiler)
+
+    def _write_stacks(self, city_url, stacks):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{_city_file_stem(city_url)}.collapsed")
+        with open(path, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        with self.lock:
+            self.merged_stacks.update(stacks)
+            with open(os.path.join(self.directory, "merged.collapsed"), "w") as f:
+                for stack, count in self.merged_stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+
+    def _write_stats(self, city_url, profiler):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{_city_file_stem(city_url)}.prof")
+        profiler.dump_stats(path)
+
+        with self.lock:
+            if self.merged_stats is None:
+                self.merged_stats = pstats.Stats(path)
+            else:
+                self.merged_stats.add(path)
+            self.merged_stats.dump_stats(os.path.join(self.directory, "merged.prof"))
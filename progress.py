@@ -0,0 +1,207 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+STATUS_FILE = "logs/status.json"
+REPORT_INTERVAL = 30  # Seconds between status lines
+THROUGHPUT_WINDOW = 300  # Seconds of history used for rates and the ETA
+STALL_SECONDS = 300  # A worker idle this long is reported as stalled
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "unknown"
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def format_cities(status):
+    done, total = status["cities_done"], status["cities_total"]
+    if not total:
+        return f"{done} cities"
+    return f"{done}/{total} cities ({done * 100 / total:.1f}%)"
+
+
+class WorkerProgress:
+    """Counters owned by a single worker thread.
+
+    Only the owning worker writes these, so updates need no lock; the reporter
+    thread just reads them, which is safe for plain ints and strings.
+    """
+
+    def __init__(self, name, progress):
+        self.name = name
+        self.progress = progress
+        self.cities = 0
+        self.pages = 0
+        self.lawyers = 0
+        self.cost_done = 0
+        self.cities_by_state = {}
+        self.current_city = None
+        self.finished = False
+        self.last_activity = time.monotonic()
+
+    def start_city(self, link):
+        self.current_city = link
+        self.last_activity = time.monotonic()
+
+    def page_done(self, lawyers):
+        self.pages += 1
+        self.lawyers += lawyers
+        self.last_activity = time.monotonic()
+
+    def finish_city(self, link):
+        state = self.progress.state_of.get(link)
+        self.cities_by_state[state] = self.cities_by_state.get(state, 0) + 1
+        self.cost_done += self.progress.costs.get(link, 1)
+        self.cities += 1
+        self.current_city = None
+        self.last_activity = time.monotonic()
+
+    def finish(self):
+        """The worker ran out of cities; it is done, not stalled."""
+        self.finished = True
+        self.current_city = None
+
+
+class CrawlProgress:
+    """Aggregate worker counters into periodic status lines and a status file.
+
+    state_of maps each queued city link to its state and costs to its estimated
+    page count, so the ETA accounts for the big cities being scheduled first.
+    """
+
+    def __init__(
+        self,
+        state_of,
+        costs=None,
+        status_file=STATUS_FILE,
+        interval=REPORT_INTERVAL,
+    ):
+        self.state_of = state_of
+        self.costs = costs or {}
+        self.status_file = status_file
+        self.interval = interval
+        self.state_totals = {}
+        for state in state_of.values():
+            self.state_totals[state] = self.state_totals.get(state, 0) + 1
+        self.total_cost = sum(self.costs.get(link, 1) for link in state_of)
+
+        self.workers = []
+        self.lock = threading.Lock()
+        self.samples = deque()
+        self.start_time = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def worker(self, name=None):
+        counters = WorkerProgress(name or threading.current_thread().name, self)
+        with self.lock:
+            self.workers.append(counters)
+        return counters
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.report()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.report()
+            except Exception as e:
+                logging.error(f"Error reporting progress: {e}")
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self.lock:
+            workers = list(self.workers)
+
+        cities = sum(worker.cities for worker in workers)
+        pages = sum(worker.pages for worker in workers)
+        lawyers = sum(worker.lawyers for worker in workers)
+        cost_done = sum(worker.cost_done for worker in workers)
+        done_by_state = {}
+        for worker in workers:
+            for state, count in list(worker.cities_by_state.items()):
+                done_by_state[state] = done_by_state.get(state, 0) + count
+
+        self.samples.append((now, cities, pages, cost_done))
+        while len(self.samples) > 2 and now - self.samples[0][0] > THROUGHPUT_WINDOW:
+            self.samples.popleft()
+        then, old_cities, old_pages, old_cost = self.samples[0]
+        window = now - then
+        pages_per_second = (pages - old_pages) / window if window else 0.0
+        cities_per_minute = (cities - old_cities) * 60 / window if window else 0.0
+        cost_rate = (cost_done - old_cost) / window if window else 0.0
+        remaining_cost = max(0, self.total_cost - cost_done)
+        eta = remaining_cost / cost_rate if cost_rate else None
+
+        return {
+            "updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "elapsed_seconds": round(now - self.start_time),
+            "cities_done": cities,
+            "cities_total": len(self.state_of),
+            "pages": pages,
+            "lawyers": lawyers,
+            "pages_per_second": round(pages_per_second, 3),
+            "cities_per_minute": round(cities_per_minute, 2),
+            "eta_seconds": round(eta) if eta is not None else None,
+            "states": {
+                state: {"done": done_by_state.get(state, 0), "total": total}
+                for state, total in sorted(self.state_totals.items())
+            },
+            "workers": [
+                {
+                    "name": worker.name,
+                    "current_city": worker.current_city,
+                    "cities": worker.cities,
+                    "pages": worker.pages,
+                    "idle_seconds": round(now - worker.last_activity),
+                    "finished": worker.finished,
+                    "stalled": not worker.finished
+                    and now - worker.last_activity > STALL_SECONDS,
+                }
+                for worker in workers
+            ],
+        }
+
+    def report(self):
+        status = self.snapshot()
+        logging.info(
+            f"Progress: {format_cities(status)},"
+            f" {status['pages_per_second']:.2f} pages/s,"
+            f" {status['cities_per_minute']:.1f} cities/min,"
+            f" ETA {format_duration(status['eta_seconds'])}"
+        )
+
+        in_progress = [
+            f"{state} {counts['done']}/{counts['total']}"
+            for state, counts in status["states"].items()
+            if 0 < counts["done"] < counts["total"]
+        ]
+        if in_progress:
+            logging.info(f"States in progress: {', '.join(in_progress)}")
+        for worker in status["workers"]:
+            if worker["stalled"]:
+                logging.warning(
+                    f"Worker {worker['name']} idle for {worker['idle_seconds']}s"
+                    f" on {worker['current_city']}"
+                )
+
+        os.makedirs(os.path.dirname(self.status_file) or ".", exist_ok=True)
+        temp_file = f"{self.status_file}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(status, f, indent=2)
+        os.replace(temp_file, self.status_file)
+        return status
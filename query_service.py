@@ -0,0 +1,238 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+from urllib.parse import urlparse
+
+from us_states import STATE_ABBREVIATIONS, parse_address
+
+CONSOLIDATED_FILE = "final/final_lawyer_data.csv"
+DATABASE_FILE = "final/final_lawyer_data.db"
+PER_PAGE = 20
+
+SCHEMA = """
+CREATE TABLE lawyers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    firm TEXT,
+    position TEXT,
+    address TEXT,
+    phone TEXT,
+    website TEXT,
+    street TEXT,
+    city TEXT,
+    state TEXT,
+    zip TEXT,
+    phone_digits TEXT,
+    domain TEXT
+);
+CREATE INDEX idx_lawyers_state_city ON lawyers (state, city COLLATE NOCASE);
+CREATE INDEX idx_lawyers_city ON lawyers (city COLLATE NOCASE);
+CREATE INDEX idx_lawyers_firm ON lawyers (firm COLLATE NOCASE);
+CREATE INDEX idx_lawyers_phone ON lawyers (phone_digits);
+CREATE INDEX idx_lawyers_domain ON lawyers (domain);
+CREATE VIRTUAL TABLE lawyers_fts USING fts5(
+    name, firm, position, address, content='lawyers', content_rowid='id'
+);
+"""
+
+COLUMNS = [
+    "name",
+    "firm",
+    "position",
+    "address",
+    "phone",
+    "website",
+    "city",
+    "state",
+    "zip",
+]
+
+
+def phone_digits(phone):
+    """Reduce a phone number to its ten-digit US form for lookups."""
+    digits = re.sub(r"\D", "", phone or "")
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    return digits
+
+
+def website_domain(website):
+    if not website:
+        return ""
+    netloc = urlparse(website if "//" in website else f"//{website}").netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+def fts_query(text):
+    """Quote each word so names like O'Brien or "Smith, P.C." search literally."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+def normalize_state(state):
+    state = state.strip()
+    return STATE_ABBREVIATIONS.get(state.lower(), state.upper())
+
+
+def build_index(csv_path=CONSOLIDATED_FILE, db_path=DATABASE_FILE):
+    """Load the consolidated CSV into a fresh indexed SQLite database."""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        rows = (
+            (name, firm, position, address, phone, website)
+            + parse_address(address)
+            + (phone_digits(phone), website_domain(website))
+            for name, firm, position, address, phone, website, *_ in reader
+        )
+        conn.executemany(
+            "INSERT INTO lawyers (name, firm, position, address, phone, website,"
+            " street, city, state, zip, phone_digits, domain)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+    conn.execute("INSERT INTO lawyers_fts (lawyers_fts) VALUES ('rebuild')")
+    conn.execute("ANALYZE")
+    conn.commit()
+    count = conn.execute("SELECT COUNT(*) FROM lawyers").fetchone()[0]
+    conn.close()
+    return count
+
+
+class LawyerIndex:
+    """Paginated lookups over the database written by build_index."""
+
+    def __init__(self, db_path=DATABASE_FILE):
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"No index at {db_path}, run the build step first")
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+
+    def close(self):
+        self.conn.close()
+
+    def search(
+        self,
+        text=None,
+        state=None,
+        city=None,
+        firm=None,
+        position=None,
+        phone=None,
+        domain=None,
+        page=1,
+        per_page=PER_PAGE,
+    ):
+        """Return one page of lawyers matching every given filter.
+
+        text matches lawyers with every one of its words in their name, firm,
+        position or address; firm and city match case-insensitively; position
+        matches as a substring.
+        """
+        if page < 1 or per_page < 1:
+            raise ValueError("page and per_page must be at least 1")
+
+        clauses, params = [], []
+        if text and text.strip():
+            clauses.append(
+                "id IN (SELECT rowid FROM lawyers_fts WHERE lawyers_fts MATCH ?)"
+            )
+            params.append(fts_query(text))
+        if state:
+            clauses.append("state = ?")
+            params.append(normalize_state(state))
+        if city:
+            clauses.append("city = ? COLLATE NOCASE")
+            params.append(city)
+        if firm:
+            clauses.append("firm = ? COLLATE NOCASE")
+            params.append(firm)
+        if position:
+            clauses.append("position LIKE ?")
+            params.append(f"%{position}%")
+        if phone:
+            clauses.append("phone_digits = ?")
+            params.append(phone_digits(phone))
+        if domain:
+            clauses.append("domain = ?")
+            params.append(website_domain(domain))
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        total = self.conn.execute(
+            f"SELECT COUNT(*) FROM lawyers {where}", params
+        ).fetchone()[0]
+        rows = self.conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM lawyers {where}"
+            " ORDER BY id LIMIT ? OFFSET ?",
+            params + [per_page, (page - 1) * per_page],
+        ).fetchall()
+
+        return {
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            "results": [dict(row) for row in rows],
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the consolidated lawyer data")
+    parser.add_argument("--db", default=DATABASE_FILE)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Build the index from the CSV")
+    build.add_argument("--csv", default=CONSOLIDATED_FILE)
+
+    query = subparsers.add_parser("query", help="Look up lawyers")
+    query.add_argument("text", nargs="?", help="Full-text query")
+    for field in ("state", "city", "firm", "position", "phone", "domain"):
+        query.add_argument(f"--{field}")
+    query.add_argument("--page", type=int, default=1)
+    query.add_argument("--per-page", type=int, default=PER_PAGE)
+    query.add_argument("--json", action="store_true", help="Print raw JSON")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        count = build_index(args.csv, args.db)
+        print(f"Indexed {count} lawyers into {args.db}")
+        return
+    if args.page < 1 or args.per_page < 1:
+        query.error("--page and --per-page must be at least 1")
+
+    index = LawyerIndex(args.db)
+    try:
+        result = index.search(
+            text=args.text,
+            state=args.state,
+            city=args.city,
+            firm=args.firm,
+            position=args.position,
+            phone=args.phone,
+            domain=args.domain,
+            page=args.page,
+            per_page=args.per_page,
+        )
+    except sqlite3.OperationalError as e:
+        query.error(f"invalid query: {e}")
+    finally:
+        index.close()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    for row in result["results"]:
+        print(" | ".join(row[column] or "" for column in COLUMNS[:6]))
+    pages = max(1, -(-result["total"] // result["per_page"]))
+    print(f"Page {result['page']} of {pages} ({result['total']} matches)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import csv
+import sys
+from typing import NamedTuple
+
+from us_states import parse_address
+
+FIELDNAMES = [
+    "Name",
+    "Company Name",
+    "Company Position",
+    "Address",
+    "Phone Number",
+    "Website",
+    "Profile URL",
+]
+
+
+class LawyerRecord(NamedTuple):
+    """One lawyer listing, from card extraction through dedup to CSV export.
+
+    A tuple has no per-instance __dict__, and the firm, position, address, city
+    and state strings are interned, so the thousands of lawyers sharing
+    "Birmingham, AL" or "Dorroh & Mills, P.C." share one string object each.
+    """
+
+    name: str
+    company_name: str
+    position: str
+    address: str
+    phone: str
+    website: str
+    profile_url: str
+    city: str
+    state: str
+
+    @classmethod
+    def create(
+        cls, name, company_name, position, address, phone, website, profile_url=""
+    ):
+        intern = sys.intern
+        _, city, state, _ = parse_address(address)
+        return cls(
+            name,
+            intern(company_name),
+            intern(position),
+            intern(address),
+            phone,
+            website,
+            profile_url,
+            intern(city),
+            intern(state),
+        )
+
+    def to_row(self):
+        """The CSV columns, in FIELDNAMES order."""
+        return self[: len(FIELDNAMES)]
+
+
+def iter_records(paths):
+    """Yield a LawyerRecord for every row of the given CSV files, one at a time.
+
+    Columns are looked up by header, so older part files without a Profile URL
+    column read the same as new ones.
+    """
+    for path in paths:
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                continue
+            columns = [
+                header.index(field) if field in header else None for field in FIELDNAMES
+            ]
+            for row in reader:
+                if not row:
+                    continue
+                yield LawyerRecord.create(
+                    *(
+                        row[index] if index is not None and index < len(row) else ""
+                        for index in columns
+                    )
+                )
+
+
+def dedupe_records(records):
+    """Drop every record whose name has been seen before, keeping the first."""
+    seen = set()
+    for record in records:
+        if record.name not in seen:
+            seen.add(record.name)
+            yield record
+
+
+def write_records(records, path):
+    """Write records to a CSV file and return how many were written."""
+    count = 0
+    with open(path, mode="w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDNAMES)
+        for record in records:
+            writer.writerow(record.to_row())
+            count += 1
+    return count
@@ -0,0 +1,117 @@
+import csv
+import json
+import math
+import threading
+from collections import Counter
+from queue import Empty, Queue
+
+from us_states import city_key_for_address, city_key_for_link
+
+CITY_COSTS_FILE = "city_costs.json"
+CONSOLIDATED_FILE = "final/final_lawyer_data.csv"
+LAWYERS_PER_PAGE = 25  # Number of lawyer cards on a full listing page
+
+
+def dataset_city_sizes(dataset_file=CONSOLIDATED_FILE):
+    """Count the lawyers per city key in a consolidated dataset.
+
+    Only cards showing "City, ST" can be placed in a city, so these are lower
+    bounds, but they rank the cities the same way the full listings do.
+    """
+    try:
+        with open(dataset_file, newline="", encoding="utf-8") as f:
+            return Counter(
+                key
+                for key in map(
+                    city_key_for_address,
+                    (row[3] for row in csv.reader(f) if len(row) > 3),
+                )
+                if key is not None
+            )
+    except FileNotFoundError:
+        return Counter()
+
+
+class CityCostModel:
+    """Estimate how many listing pages each city takes to crawl.
+
+    Estimates come from the page counts recorded on previous runs, then from the
+    result count read off a city's first page, then from the city's lawyers in
+    the consolidated dataset, and finally from the average of the known cities
+    in the same state link file. The dataset seed means the very first run of a
+    crawl already starts with the big cities.
+    """
+
+    def __init__(self, filename=CITY_COSTS_FILE, dataset_file=CONSOLIDATED_FILE):
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.costs = self._load_costs()
+        self.dataset_sizes = dataset_city_sizes(dataset_file) if dataset_file else {}
+
+    def _load_costs(self):
+        try:
+            with open(self.filename, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_costs(self):
+        with open(self.filename, "w") as f:
+            json.dump(self.costs, f)
+
+    def record(self, link, pages=None, results=None):
+        with self.lock:
+            entry = self.costs.setdefault(link, {})
+            if pages:
+                entry["pages"] = pages
+            if results is not None:
+                entry["results"] = results
+            self._save_costs()
+
+    def known_estimate(self, link):
+        entry = self.costs.get(link) or {}
+        if entry.get("pages"):
+            return entry["pages"]
+        if entry.get("results") is not None:
+            return max(1, math.ceil(entry["results"] / LAWYERS_PER_PAGE))
+        lawyers = self.dataset_sizes.get(city_key_for_link(link))
+        if lawyers:
+            return math.ceil(lawyers / LAWYERS_PER_PAGE)
+        return None
+
+    def state_default(self, links):
+        """Average known cost of the cities in one link file, used for unseen cities."""
+        known = [self.known_estimate(link) for link in links]
+        known = [cost for cost in known if cost is not None]
+        if not known:
+            return 1
+        return sum(known) / len(known)
+
+    def estimate(self, link, default=1):
+        known = self.known_estimate(link)
+        return known if known is not None else default
+
+
+def order_by_cost(work):
+    """Sort (cost, link) pairs most expensive first, ties broken by link."""
+    return [link for cost, link in sorted(work, key=lambda item: (-item[0], item[1]))]
+
+
+def build_work_queue(links):
+    queue = Queue()
+    for link in links:
+        queue.put(link)
+    return queue
+
+
+def drain_queue(queue):
+    """Yield links from a shared queue until it is empty.
+
+    Each worker gets its own generator over the same queue, so whichever worker
+    frees up first takes the next most expensive city (LPT scheduling).
+    """
+    while True:
+        try:
+            yield queue.get_nowait()
+        except Empty:
+            return
@@ -13,14 +13,17 @@ import csv
 import json
 import logging
 
-options = webdriver.FirefoxOptions()
-options.add_argument("--headless")
-options.add_argument("--disable-gpu")
-options.add_argument("--no-sandbox")
-#options.add_argument("--window-size=1920,1080")
-driver = webdriver.Firefox(options=options)
-
 BASE_URL = "https://www.martindale.com/by-location/"
+LINKS_DIRECTORY = "links"
+
+
+def create_driver():
+    options = webdriver.FirefoxOptions()
+    options.add_argument("--headless")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    #options.add_argument("--window-size=1920,1080")
+    return webdriver.Firefox(options=options)
 
 
 def get_links(state_link, city_links):
@@ -35,15 +38,16 @@ def get_links(state_link, city_links):
 
     #state_link = state_link.translate({ord(ch):' ' for ch in './:-'})
     state_name = extract_state_name(state_link)
-    with open(f'links/{state_name}.txt', 'w') as f:
+    with open(os.path.join(LINKS_DIRECTORY, f'{state_name}.txt'), 'w') as f:
         for link in city_links:
             f.write(f"{link}\n")
 
 
-def process_state_links():
+def process_state_links(driver):
     """
     Visit each state and extract city links
     """
+    os.makedirs(LINKS_DIRECTORY, exist_ok=True)
     state_count = 0
     driver.get(BASE_URL)
     time.sleep(2)
@@ -61,7 +65,7 @@ def process_state_links():
             city.get_attribute("href")
             for city in driver.find_elements(By.CSS_SELECTOR, "#cityPanelAll div ul li a")
         ]
-        get_links(state_links, city_links)
+        get_links(state_link, city_links)
         
         #print(len(city_links))
         #process_city_links(city_links)
@@ -70,4 +74,13 @@ def process_state_links():
         print(f"We are at state #{state_count}")
 
 
-process_state_links()
\ No newline at end of file
+def discover():
+    driver = create_driver()
+    try:
+        process_state_links(driver)
+    finally:
+        driver.quit()
+
+
+if __name__ == '__main__':
+    discover()
@@ -0,0 +1,99 @@
+import html
+import json
+import os
+import sys
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def listing_page(lawyers):
+    """A Martindale-style listing page with one card per (name, profile path, address)."""
+    cards = "".join(
+        f'<div class="medium-12 columns card card--attorney"><ul>'
+        f'<li class="detail_title"><a href="{path}"><h3>{html.escape(name)}</h3></a></li>'
+        f'<li class="detail_position">Partner at {html.escape(name)} Law, PLLC</li>'
+        f'<li class="detail_location">{html.escape(address)}</li>'
+        f"</ul></div>"
+        for name, path, address in lawyers
+    )
+    return f"<html><body><p>1 - {len(lawyers)} of {len(lawyers)} results</p>{cards}</body></html>"
+
+
+def profile_page(name, street, city, state, zip_code, phone, website, areas):
+    data = {
+        "@context": "https://schema.org",
+        "@graph": [
+            {"@type": "WebPage", "name": name},
+            {
+                "@type": "Attorney",
+                "name": name,
+                "address": {
+                    "@type": "PostalAddress",
+                    "streetAddress": street,
+                    "addressLocality": city,
+                    "addressRegion": state,
+                    "postalCode": zip_code,
+                },
+                "telephone": phone,
+                "url": website,
+                "knowsAbout": areas,
+            },
+        ],
+    }
+    return (
+        "<html><head>"
+        f'<script type="application/ld+json">{json.dumps(data)}</script>'
+        f"</head><body><h1>{html.escape(name)}</h1></body></html>"
+    )
+
+
+class FixtureSite:
+    """Pages served by a local HTTP server, with a hit count per path."""
+
+    def __init__(self):
+        self.pages = {}
+        self.hits = Counter()
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, path):
+        return f"{self.base_url}{path}"
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with site.lock:
+                    site.hits[self.path] += 1
+                page = site.pages.get(self.path)
+                if page is None:
+                    self.send_error(404)
+                    return
+                body = page.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def fixture_site():
+    site = FixtureSite()
+    site.thread.start()
+    yield site
+    site.server.shutdown()
+    site.server.server_close()
@@ -0,0 +1,71 @@
+"""A coordinated crawl worker that reads fixture listings over plain HTTP.
+
+It stands in for `main.py crawl --worker` without a browser: lease a city,
+read its listing page, upload the shard, repeat. Prints one line per city it
+completed. With --abandon it leases one city and exits without completing it,
+like a worker that crashed.
+
+    python tests/fixture_worker.py COORDINATOR_URL WORKER_ID [--abandon]
+"""
+
+import csv
+import html
+import io
+import os
+import re
+import sys
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coordinator import CoordinatorClient  # noqa: E402
+from records import FIELDNAMES, LawyerRecord  # noqa: E402
+
+CARD_PATTERN = re.compile(
+    r'<li class="detail_title"><a href="(?P<profile>[^"]*)"><h3>(?P<name>.*?)</h3>'
+    r'.*?<li class="detail_position">(?P<position>.*?)</li>'
+    r'.*?<li class="detail_location">(?P<address>.*?)</li>',
+    re.DOTALL,
+)
+
+
+def read_listing(link):
+    with urllib.request.urlopen(link, timeout=10) as response:
+        page = response.read().decode("utf-8")
+    for card in CARD_PATTERN.finditer(page):
+        position, company_name = html.unescape(card["position"]).split(" at ", 1)
+        yield LawyerRecord.create(
+            html.unescape(card["name"]),
+            company_name,
+            position,
+            html.unescape(card["address"]),
+            "",
+            "",
+            card["profile"],
+        )
+
+
+def main():
+    coordinator_url, worker = sys.argv[1], sys.argv[2]
+    client = CoordinatorClient(coordinator_url, worker)
+
+    while True:
+        lease = client.lease()
+        if lease is None:
+            return
+        if "--abandon" in sys.argv:
+            return
+
+        shard = io.StringIO()
+        writer = csv.writer(shard)
+        writer.writerow(FIELDNAMES)
+        with client.heartbeat(lease):
+            records = list(read_listing(lease["link"]))
+            for record in records:
+                writer.writerow(record.to_row())
+        if client.complete(lease, shard.getvalue(), pages=1, results=len(records)):
+            print(lease["link"], flush=True)
+
+
+if __name__ == "__main__":
+    main()
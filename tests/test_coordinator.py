@@ -0,0 +1,120 @@
+import os
+import subprocess
+import sys
+import threading
+from collections import Counter
+
+import pytest
+
+import coordinator
+from conftest import listing_page
+from coordinator import make_server, merge_shards
+
+WORKER_SCRIPT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "fixture_worker.py"
+)
+WORKERS = 3
+
+
+# Twelve city listings of one to four lawyers, plus one lawyer listed in four
+CITIES = {
+    f"/all-lawyers/city-{i:02d}/ohio/": [
+        (f"Lawyer {i}-{j}", f"/attorney/lawyer-{i}-{j}/", f"City {i:02d}, OH")
+        for j in range(i % 4 + 1)
+    ]
+    + (
+        [("Shared Lawyer", "/attorney/shared/", f"City {i:02d}, OH")]
+        if i % 3 == 0
+        else []
+    )
+    for i in range(12)
+}
+
+
+@pytest.fixture
+def site(fixture_site):
+    for path, lawyers in CITIES.items():
+        fixture_site.pages[path] = listing_page(lawyers)
+    return fixture_site
+
+
+@pytest.fixture
+def fast_leases(monkeypatch):
+    # Abandoned leases come back after a second, idle workers poll quickly
+    monkeypatch.setattr(coordinator, "LEASE_SECONDS", 1)
+    monkeypatch.setattr(coordinator, "RETRY_SECONDS", 0.2)
+
+
+def run_crawl(site, directory, abandon=False):
+    """Serve the fixture cities to WORKERS worker processes and merge the shards."""
+    os.makedirs(directory)
+    links = [site.url(path) for path in CITIES]
+    state_file = os.path.join(directory, "state.json")
+    shard_directory = os.path.join(directory, "shards")
+    server = make_server(links, "127.0.0.1", 0, state_file, shard_directory)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        if abandon:
+            subprocess.run(
+                [sys.executable, WORKER_SCRIPT, url, "crashed", "--abandon"],
+                check=True,
+                timeout=30,
+            )
+        workers = [
+            subprocess.Popen(
+                [sys.executable, WORKER_SCRIPT, url, f"worker-{i}"],
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            for i in range(WORKERS)
+        ]
+        completed = []
+        for worker in workers:
+            output, _ = worker.communicate(timeout=60)
+            assert worker.returncode == 0
+            completed.extend(output.split())
+        status = server.queue.status()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    output_file = os.path.join(directory, "merged.csv")
+    count = merge_shards(state_file, shard_directory, output_file)
+    with open(output_file, "rb") as f:
+        return links, completed, status, count, f.read()
+
+
+def test_every_city_completes_exactly_once(site, fast_leases, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    links, completed, status, count, _ = run_crawl(site, "run")
+
+    assert Counter(completed) == Counter(links)
+    assert status["pending"] == 0 and status["leased"] == 0
+    assert status["completed"] == len(links)
+    # Each listing was read by exactly one worker
+    assert all(site.hits[path] == 1 for path in CITIES)
+    # Shared Lawyer is listed in four cities but merged once
+    assert count == sum(len(lawyers) for lawyers in CITIES.values()) - 3
+
+
+def test_abandoned_lease_is_handed_out_again(site, fast_leases, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    links, completed, status, _, _ = run_crawl(site, "run", abandon=True)
+
+    assert Counter(completed) == Counter(links)
+    assert status["completed"] == len(links)
+
+
+def test_merge_is_deterministic(site, fast_leases, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    *_, first = run_crawl(site, "first")
+    # Different worker interleaving and a reclaimed lease, same merged bytes
+    *_, second = run_crawl(site, "second", abandon=True)
+    assert first == second
+
+    merge_shards("first/state.json", "first/shards", "again.csv")
+    with open("again.csv", "rb") as f:
+        assert f.read() == first
@@ -0,0 +1,204 @@
+import csv
+import io
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+import coordinator
+import crawler
+from change_detection import CityFingerprints
+from coordinator import CoordinatorClient, make_server
+from records import LawyerRecord
+
+NEXT_BUTTON_SELECTOR = "ul.inline-list.right.pagination a[rel='next']"
+
+
+class FakeElement:
+    def __init__(self, text="", attributes=None, children=None):
+        self.text = text
+        self.attributes = attributes or {}
+        self.children = children or {}
+
+    def get_attribute(self, name):
+        return self.attributes.get(name)
+
+    def find_element(self, by, value):
+        if value not in self.children:
+            raise NoSuchElementException(value)
+        return self.children[value]
+
+
+def lawyer_card(name, address):
+    link = FakeElement(
+        attributes={"href": f"https://example.com/attorney/{name}/"},
+        children={"h3": FakeElement(name)},
+    )
+    return FakeElement(
+        f"{name}\nPartner at {name} Law\n{address}",
+        children={
+            "li.detail_title > a": link,
+            "li.detail_position": FakeElement(f"Partner at {name} Law"),
+            "li.detail_location": FakeElement(address),
+        },
+    )
+
+
+class FakeButton(FakeElement):
+    def __init__(self, driver, disabled):
+        super().__init__(attributes={"class": "unavailable" if disabled else ""})
+        self.driver = driver
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def click(self):
+        self.driver.page += 1
+
+
+class FakeDriver:
+    """Serves listing pages of lawyer cards to the crawler in place of Firefox.
+
+    cities maps a link to its pages, each a list of (name, address). The next
+    button is disabled on the last page, or missing from page `missing_next`
+    on. Links in `failing` raise like a DNS failure.
+    """
+
+    def __init__(self, cities, result_count=None, missing_next=None, failing=()):
+        self.cities = cities
+        self.result_count = result_count
+        self.missing_next = missing_next
+        self.failing = failing
+        self.pages = []
+        self.page = 0
+
+    def get(self, link):
+        if link in self.failing:
+            raise WebDriverException("dns failure")
+        self.pages = self.cities[link]
+        self.page = 0
+
+    def find_element(self, by, value):
+        if value == "body":
+            if self.result_count is None:
+                return FakeElement("Lawyers near you")
+            return FakeElement(f"1 - 25 of {self.result_count} results")
+        if value == NEXT_BUTTON_SELECTOR:
+            if self.missing_next is not None and self.page + 1 >= self.missing_next:
+                raise NoSuchElementException(value)
+            return FakeButton(self, disabled=self.page == len(self.pages) - 1)
+        raise NoSuchElementException(value)
+
+    def find_elements(self, by, value):
+        if value == crawler.LAWYER_CARD_SELECTOR:
+            return [lawyer_card(*lawyer) for lawyer in self.pages[self.page]]
+        return []
+
+
+def city_pages(city, pages, per_page=2):
+    return [
+        [(f"{city} {page}-{i}", f"{city.title()}, OH") for i in range(per_page)]
+        for page in range(pages)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def fast_crawl(monkeypatch, tmp_path):
+    # City logs and shards are written under the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(crawler, "time", SimpleNamespace(sleep=lambda seconds: None))
+    monkeypatch.setattr(
+        crawler,
+        "WebDriverWait",
+        lambda driver, timeout: WebDriverWait(driver, 0, poll_frequency=0.01),
+    )
+
+
+def crawl_city(driver, link, fingerprints):
+    shard_writer = csv.writer(io.StringIO())
+    processor = crawler.CityProcessor(link, 0, 0, shard_writer=shard_writer)
+    processor.process_city(driver, fingerprints)
+    return processor
+
+
+@pytest.mark.parametrize(
+    "result_count, missing_next, complete",
+    [
+        # Disabled next button on the last page
+        (None, None, True),
+        # No pagination links on a single-page city
+        (None, 1, True),
+        # Button gone on page 2 of 3 with no count to check against
+        (None, 2, False),
+        # Button gone on page 2, but the count says there are three
+        (75, 2, False),
+        # Button gone on the page the count says is the last
+        (75, 3, True),
+    ],
+)
+def test_only_complete_cities_are_fingerprinted(result_count, missing_next, complete):
+    # A link per case: pytest hooks its log capture onto existing city loggers,
+    # and CityLogger only sets up one that has no handlers yet
+    link = f"https://example.com/all-lawyers/akron-{result_count}-{missing_next}/ohio/"
+    pages = city_pages("akron", 3 if missing_next != 1 else 1)
+    driver = FakeDriver({link: pages}, result_count, missing_next)
+    fingerprints = CityFingerprints("fingerprints.json", "rosters")
+
+    processor = crawl_city(driver, link, fingerprints)
+
+    assert processor.reached_last_page is complete
+    assert (link in fingerprints.fingerprints) is complete
+    if complete:
+        roster = fingerprints.roster(link)
+        assert [record.name for record in roster] == [
+            name for page in pages for name, _ in page
+        ]
+        assert all(isinstance(record, LawyerRecord) for record in roster)
+    else:
+        assert fingerprints.roster(link) is None
+    # The roster was streamed to a temporary file, never left behind
+    assert len(os.listdir("rosters")) == int(complete)
+
+
+def test_failed_cities_are_handed_back_not_completed():
+    links = [
+        f"https://example.com/all-lawyers/{city}/ohio/"
+        for city in ("dayton", "toledo", "unreachable")
+    ]
+    dayton, toledo, unreachable = links
+    driver = FakeDriver(
+        {dayton: city_pages("dayton", 2), toledo: city_pages("toledo", 1)},
+        failing={unreachable},
+    )
+    server = make_server(links, "127.0.0.1", 0, "state.json", "shards")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = CoordinatorClient(f"http://127.0.0.1:{server.server_address[1]}", "w")
+
+    try:
+        # The worker loop itself, not a stand-in for it
+        crawler.process_coordinated_links(driver, client)
+        status = server.queue.status()
+        completed = dict(server.queue.completed)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert sorted(completed) == sorted([dayton, toledo])
+    assert completed[dayton]["pages"] == 2
+    assert status["failed"] == [unreachable]
+    assert server.queue.failures[unreachable] == coordinator.MAX_ATTEMPTS
+    assert status["pending"] == 0 and status["leased"] == 0
+
+    shard = os.path.join("shards", completed[dayton]["shard"])
+    with open(shard, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))[1:]
+    assert [row[0] for row in rows] == [
+        name for page in city_pages("dayton", 2) for name, _ in page
+    ]
@@ -0,0 +1,125 @@
+import os
+import re
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import listing_page, profile_page
+from enrichment import PROFILE_FIELDS, ProfileEnricher, load_profile_cache
+
+PROFILES = {
+    "/attorney/jane-roe-1/": profile_page(
+        "Jane Roe",
+        "100 Main St.",
+        "Columbus",
+        "OH",
+        "43215-1234",
+        "(614) 555-0100",
+        "https://roelaw.example/",
+        ["Family Law", {"@type": "Thing", "name": "Estate Planning"}],
+    ),
+    "/attorney/john-doe-2/": profile_page(
+        "John Doe",
+        "9 Elm Ave.",
+        "Dublin",
+        "OH",
+        "43017",
+        "(614) 555-0199",
+        "https://doelaw.example/",
+        ["Criminal Defense"],
+    ),
+}
+# Jane Roe practices in both cities, like firms listed across a metro area
+CITIES = {
+    "/all-lawyers/columbus/ohio/": [
+        ("Jane Roe", "/attorney/jane-roe-1/", "Columbus, OH"),
+        ("John Doe", "/attorney/john-doe-2/", "Columbus, OH"),
+    ],
+    "/all-lawyers/dublin/ohio/": [
+        ("Jane Roe", "/attorney/jane-roe-1/", "Dublin, OH"),
+    ],
+}
+
+
+@pytest.fixture
+def site(fixture_site):
+    fixture_site.pages.update(PROFILES)
+    for path, lawyers in CITIES.items():
+        fixture_site.pages[path] = listing_page(lawyers)
+    return fixture_site
+
+
+def profile_urls(site, city_path):
+    """The profile links the crawler would read off one city's listing."""
+    with urllib.request.urlopen(site.url(city_path)) as response:
+        page = response.read().decode("utf-8")
+    return [site.url(path) for path in re.findall(r'href="([^"]+)"', page)]
+
+
+def crawl_cities(site, enricher):
+    # Each city on its own thread, like the crawl workers sharing one enricher
+    with ThreadPoolExecutor(max_workers=len(CITIES)) as executor:
+        for urls in executor.map(lambda path: profile_urls(site, path), CITIES):
+            for url in urls:
+                enricher.submit(url)
+    enricher.close()
+
+
+def test_profiles_are_fetched_once_and_cached(site, tmp_path):
+    cache_dir = tmp_path / "profiles"
+    enricher = ProfileEnricher(cache_dir=str(cache_dir), delay=0)
+    crawl_cities(site, enricher)
+
+    assert site.hits["/attorney/jane-roe-1/"] == 1
+    assert site.hits["/attorney/john-doe-2/"] == 1
+    assert enricher.fetched == 2
+    assert len(os.listdir(cache_dir)) == 2
+
+    profiles = {
+        profile["Profile URL"]: profile for profile in load_profile_cache(cache_dir)
+    }
+    jane = profiles[site.url("/attorney/jane-roe-1/")]
+    assert set(jane) == set(PROFILE_FIELDS)
+    assert jane["Profile Address"] == "100 Main St., Columbus, OH 43215-1234"
+    assert jane["Profile Phone"] == "(614) 555-0100"
+    assert jane["Practice Areas"] == "Family Law; Estate Planning"
+
+
+def test_cached_profiles_are_not_fetched_again(site, tmp_path):
+    cache_dir = str(tmp_path / "profiles")
+    crawl_cities(site, ProfileEnricher(cache_dir=cache_dir, delay=0))
+
+    rerun = ProfileEnricher(cache_dir=cache_dir, delay=0)
+    crawl_cities(site, rerun)
+
+    assert site.hits["/attorney/jane-roe-1/"] == 1
+    assert site.hits["/attorney/john-doe-2/"] == 1
+    assert rerun.fetched == 0
+
+
+def test_attach_profiles_joins_cached_fields(site, tmp_path):
+    pd = pytest.importorskip("pandas")
+    from data_handling import attach_profiles
+
+    cache_dir = str(tmp_path / "profiles")
+    crawl_cities(site, ProfileEnricher(cache_dir=cache_dir, delay=0))
+
+    df = pd.DataFrame(
+        {
+            "Name": ["Jane Roe", "John Doe", "No Profile"],
+            "Address": ["Columbus, OH", "Columbus, OH", "Dublin, OH"],
+            "Profile URL": [
+                site.url("/attorney/jane-roe-1/"),
+                site.url("/attorney/john-doe-2/"),
+                "",
+            ],
+        }
+    )
+    joined = attach_profiles(df, cache_dir).set_index("Name")
+
+    assert len(joined) == 3
+    assert joined.loc["Jane Roe", "Profile Street"] == "100 Main St."
+    assert joined.loc["John Doe", "Profile ZIP"] == "43017"
+    assert joined.loc["John Doe", "Practice Areas"] == "Criminal Defense"
+    assert pd.isna(joined.loc["No Profile", "Profile City"])
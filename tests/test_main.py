@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+import main
+from records import LawyerRecord, write_records
+
+
+def test_merge_prints_its_stats(tmp_path, monkeypatch, capsys):
+    pytest.importorskip("pandas")
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("final")
+    for part, names in enumerate([["Ann Lee", "Bo Chan"], ["Bo Chan", "Cy Diaz"]]):
+        write_records(
+            (
+                LawyerRecord.create(name, "Lee & Chan", "Partner", "Akron, OH", "", "")
+                for name in names
+            ),
+            f"final/lawyer_data_{part}.csv",
+        )
+
+    assert not main.main(["merge"])
+
+    output = capsys.readouterr().out
+    assert "Files processed: 2" in output
+    assert "Total records: 4" in output
+    assert "Final records: 3" in output
+    assert "Duplicates removed: 1" in output
+    assert "Combined file saved to: final/final_lawyer_data.xlsx" in output
+
+
+def test_failures_exit_non_zero(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # Nothing to merge and no city links to crawl
+    assert main.main(["merge"]) == 1
+    assert main.main(["crawl", "--links", "missing"]) == 1
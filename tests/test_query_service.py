@@ -0,0 +1,50 @@
+import pytest
+
+import query_service
+from query_service import LawyerIndex, build_index
+from records import LawyerRecord, write_records
+
+LAWYERS = [
+    ("Kevin O'Brien", "O'Brien Law", "Partner", "Akron, OH", "(330) 555-0101"),
+    ("Ann Dorroh", "Dorroh & Mills", "Partner", "Mobile, AL", "(251) 555-0102"),
+    ("Joe Smith", "Smith, P.C.", "Associate", "Mobile, AL", "(251) 555-0103"),
+]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    csv_path = tmp_path / "lawyers.csv"
+    db_path = str(tmp_path / "lawyers.db")
+    write_records(
+        (
+            LawyerRecord.create(name, firm, position, address, phone, "")
+            for name, firm, position, address, phone in LAWYERS
+        ),
+        csv_path,
+    )
+    build_index(csv_path, db_path)
+    return db_path
+
+
+@pytest.mark.parametrize(
+    "text, names",
+    [
+        ("O'Brien", ["Kevin O'Brien"]),
+        ("Dorroh & Mills", ["Ann Dorroh"]),
+        ("Smith, P.C.", ["Joe Smith"]),
+        ('"partner" mobile', ["Ann Dorroh"]),
+        ("NOT OR", []),
+    ],
+)
+def test_text_is_searched_literally(db_path, text, names):
+    index = LawyerIndex(db_path)
+    result = index.search(text=text)
+    index.close()
+    assert [row["name"] for row in result["results"]] == names
+
+
+def test_page_below_one_is_a_usage_error(db_path, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        query_service.main(["--db", db_path, "query", "Smith", "--page", "0"])
+    assert exit_info.value.code == 2
+    assert "--page" in capsys.readouterr().err
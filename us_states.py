@@ -0,0 +1,123 @@
+import re
+
+# "Birmingham, AL", "403 Choccolocco St., AL 36203" or "NM 88240-4403"
+ADDRESS_PATTERN = re.compile(
+    r"^(?:(?P<prefix>.*?),\s*)?(?P<state>[A-Z]{2})"
+    r"(?:\s+(?P<zip>\d{5})(?:-?(?P<zip4>\d{4}))?)?$"
+)
+
+STATE_ABBREVIATIONS = {
+    "alabama": "AL",
+    "alaska": "AK",
+    "arizona": "AZ",
+    "arkansas": "AR",
+    "california": "CA",
+    "colorado": "CO",
+    "connecticut": "CT",
+    "delaware": "DE",
+    "district of columbia": "DC",
+    "florida": "FL",
+    "georgia": "GA",
+    "hawaii": "HI",
+    "idaho": "ID",
+    "illinois": "IL",
+    "indiana": "IN",
+    "iowa": "IA",
+    "kansas": "KS",
+    "kentucky": "KY",
+    "louisiana": "LA",
+    "maine": "ME",
+    "maryland": "MD",
+    "massachusetts": "MA",
+    "michigan": "MI",
+    "minnesota": "MN",
+    "mississippi": "MS",
+    "missouri": "MO",
+    "montana": "MT",
+    "nebraska": "NE",
+    "nevada": "NV",
+    "new hampshire": "NH",
+    "new jersey": "NJ",
+    "new mexico": "NM",
+    "new york": "NY",
+    "north carolina": "NC",
+    "north dakota": "ND",
+    "ohio": "OH",
+    "oklahoma": "OK",
+    "oregon": "OR",
+    "pennsylvania": "PA",
+    "rhode island": "RI",
+    "south carolina": "SC",
+    "south dakota": "SD",
+    "tennessee": "TN",
+    "texas": "TX",
+    "utah": "UT",
+    "vermont": "VT",
+    "virginia": "VA",
+    "washington": "WA",
+    "west virginia": "WV",
+    "wisconsin": "WI",
+    "wyoming": "WY",
+}
+
+
+def city_from_link(city_link):
+    """Return the (city, state) names encoded in a /all-lawyers/<city>/<state>/ link."""
+    parts = [part for part in city_link.rstrip("/").split("/") if part]
+    if len(parts) < 2:
+        return None, None
+    city_slug, state_slug = parts[-2], parts[-1]
+    city = city_slug.replace("-", " ").title()
+    state = state_slug.replace("-", " ")
+    return city, state
+
+
+def normalize_city(city):
+    """Reduce a city name to the form link slugs and listing cards agree on.
+
+    "St. Louis", "saint-louis" and "st-louis" all become "stlouis", and
+    "McLean" and "mc-lean" both become "mclean".
+    """
+    city = re.sub(r"\bsaint\b", "st", city.lower())
+    return re.sub(r"[^a-z0-9]", "", city)
+
+
+def city_key(city, state):
+    """Return a "city, ST" key for matching, from a state name or abbreviation."""
+    abbreviation = STATE_ABBREVIATIONS.get(state.lower(), state.upper())
+    if not city or abbreviation not in STATE_ABBREVIATIONS.values():
+        return None
+    return f"{normalize_city(city)}, {abbreviation}"
+
+
+def city_key_for_link(city_link):
+    city, state = city_from_link(city_link)
+    if not city:
+        return None
+    return city_key(city, state)
+
+
+def city_key_for_address(address):
+    """The city key of a "City, ST" card address, None for street addresses."""
+    _, city, state, _ = parse_address(address)
+    if not city:
+        return None
+    return city_key(city, state)
+
+
+def parse_address(address):
+    """Split a listing address into (street, city, state, zip).
+
+    Cards show either "City, ST" or a street address ending in "ST ZIP", so a
+    city is only known for the first form.
+    """
+    match = ADDRESS_PATTERN.match(address.strip())
+    if not match:
+        return address, "", "", ""
+    prefix = match.group("prefix") or ""
+    zip_code = match.group("zip") or ""
+    if match.group("zip4"):
+        zip_code = f"{zip_code}-{match.group('zip4')}"
+    if zip_code:
+        return prefix, "", match.group("state"), zip_code
+    return "", prefix, match.group("state"), ""